@@ -1,23 +1,114 @@
 import os
+from typing import Optional
 from dotenv import load_dotenv
 
 load_dotenv()
 
+def _optional_int(name: str) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else None
+
+def _bool(name: str, default: bool = False) -> bool:
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
 class Settings:
     def __init__(self):
         self.EMBEDDINGS: str = os.getenv("EMBEDDINGS")
         self.QDRANT_API_KEY: str = os.getenv("QDRANT_API_KEY")
         self.QDRANT_URL: str = os.getenv("QDRANT_URL")
+        # Vectors go over gRPC (binary floats) instead of JSON when the server exposes the port
+        self.QDRANT_PREFER_GRPC: bool = _bool("QDRANT_PREFER_GRPC", True)
+        self.QDRANT_GRPC_PORT: int = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
     
         self.COLLECTION_NAME: str = "fly-senga-openai"
         self.EMBEDDING_DIMENSION: int = 1536
         self.EMBEDDING_MODEL_NAME: str = "text-embedding-3-small"
 
+        # HNSW index parameters used when the collection is created
+        self.QDRANT_HNSW_M: Optional[int] = _optional_int("QDRANT_HNSW_M")
+        self.QDRANT_HNSW_EF_CONSTRUCT: Optional[int] = _optional_int("QDRANT_HNSW_EF_CONSTRUCT")
+
+        # Search-time parameters, can be overridden per request
+        self.QDRANT_HNSW_EF: Optional[int] = _optional_int("QDRANT_HNSW_EF")
+        self.QDRANT_EXACT_SEARCH: bool = _bool("QDRANT_EXACT_SEARCH")
+        self.QDRANT_INDEXED_ONLY: bool = _bool("QDRANT_INDEXED_ONLY")
+
         self.SCORING_THRESHOLD: float = 0.0
+
+        # "background" warms clients after startup, "blocking" before accepting
+        # requests, "off" leaves everything to the first request
+        self.WARMUP_MODE: str = os.getenv("WARMUP_MODE", "background")
+        self.WARMUP_CONNECTIONS: bool = _bool("WARMUP_CONNECTIONS", True)
+
+        # Cache for enhancements, embeddings and rerankings shared by all workers
+        # on the host: "sqlite", "redis" or "off"
+        self.CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "sqlite")
+        self.CACHE_PATH: str = os.getenv("CACHE_PATH", "search_cache.db")
+        self.CACHE_REDIS_URL: str = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+        self.CACHE_MAX_ENTRIES: int = int(os.getenv("CACHE_MAX_ENTRIES", "100000"))
+        self.CACHE_TTL_ENHANCEMENT: float = float(os.getenv("CACHE_TTL_ENHANCEMENT", "86400"))
+        self.CACHE_TTL_EMBEDDING: float = float(os.getenv("CACHE_TTL_EMBEDDING", "2592000"))
+        self.CACHE_TTL_RERANK: float = float(os.getenv("CACHE_TTL_RERANK", "3600"))
+
+        # Adaptive depth: retrieve up to RERANK_MAX_CANDIDATES per search and let the
+        # score curve decide how many go to the reranker. A relative drop of
+        # ADAPTIVE_CUTOFF_DROP between neighbours cuts the list; a top-to-bottom
+        # spread within ADAPTIVE_FLAT_SPREAD on a keyword query reranks them all
+        self.ADAPTIVE_DEPTH: bool = _bool("ADAPTIVE_DEPTH")
+        self.RERANK_MIN_CANDIDATES: int = int(os.getenv("RERANK_MIN_CANDIDATES", "5"))
+        self.RERANK_MAX_CANDIDATES: int = int(os.getenv("RERANK_MAX_CANDIDATES", "40"))
+        self.ADAPTIVE_CUTOFF_DROP: float = float(os.getenv("ADAPTIVE_CUTOFF_DROP", "0.1"))
+        self.ADAPTIVE_FLAT_SPREAD: float = float(os.getenv("ADAPTIVE_FLAT_SPREAD", "0.05"))
+
+        # Paginated searches retrieve this many candidates up front and keep the
+        # unserved ones under a cursor in the shared cache
+        self.PAGINATION_DEPTH: int = int(os.getenv("PAGINATION_DEPTH", "60"))
+        self.CURSOR_TTL_SECONDS: float = float(os.getenv("CURSOR_TTL_SECONDS", "900"))
+
+        # Typeahead index is rebuilt from Qdrant this often to pick up other workers' changes
+        self.SUGGEST_REFRESH_SECONDS: float = float(os.getenv("SUGGEST_REFRESH_SECONDS", "300"))
+
+        # Background upload jobs
+        self.UPLOAD_JOB_DB_PATH: str = os.getenv("UPLOAD_JOB_DB_PATH", "upload_jobs.db")
+        self.UPLOAD_JOB_WORKERS: int = int(os.getenv("UPLOAD_JOB_WORKERS", "2"))
+        self.UPLOAD_JOB_LEASE_SECONDS: float = float(os.getenv("UPLOAD_JOB_LEASE_SECONDS", "300"))
+
+        # End-to-end deadline for /api/search and each stage's share of it;
+        # reranking gets whatever is left
+        self.SEARCH_DEADLINE_SECONDS: float = float(os.getenv("SEARCH_DEADLINE_SECONDS", "12"))
+        self.ENHANCE_BUDGET: float = float(os.getenv("ENHANCE_BUDGET", "0.45"))
+        self.EMBED_BUDGET: float = float(os.getenv("EMBED_BUDGET", "0.15"))
+        self.VECTOR_SEARCH_BUDGET: float = float(os.getenv("VECTOR_SEARCH_BUDGET", "0.15"))
+        self.EMBED_HEDGE_DELAY_SECONDS: float = float(os.getenv("EMBED_HEDGE_DELAY_SECONDS", "0.4"))
+        self.CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+        self.CIRCUIT_RESET_SECONDS: float = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+
+        # Embed the raw query and search unfiltered while the query is enhanced
+        self.SPECULATIVE_RETRIEVAL: bool = _bool("SPECULATIVE_RETRIEVAL")
+        self.SPECULATIVE_LIMIT: int = int(os.getenv("SPECULATIVE_LIMIT", "40"))
         self.OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY")
+
+        # Query embeddings arriving within this window (or until this many texts)
+        # are sent as one batched call; 0 disables micro-batching
+        self.EMBED_BATCH_WINDOW_MS: float = float(os.getenv("EMBED_BATCH_WINDOW_MS", "5"))
+        self.EMBED_BATCH_MAX_TEXTS: int = int(os.getenv("EMBED_BATCH_MAX_TEXTS", "64"))
+        # OpenAI embedding quota shared by search and uploads (0 = unlimited), split
+        # evenly between the worker processes
+        self.OPENAI_EMBED_RPM: float = float(os.getenv("OPENAI_EMBED_RPM", "0"))
+        self.OPENAI_EMBED_TPM: float = float(os.getenv("OPENAI_EMBED_TPM", "0"))
+        self.OPENAI_QUOTA_WORKERS: int = int(os.getenv("WEB_CONCURRENCY", "1"))
         self.LLM_MODEL_ENHANCER: str = "gpt-4.1"
         self.LLM_MODEL_RERANKER: str = "gpt-4.1-nano"
         self.LLM_TEMPERATURE: float = 0.1
 
+        # "single" ranks all candidates in one prompt, "sharded" scores compact
+        # candidate shards concurrently and merges the scores
+        self.RERANK_MODE: str = os.getenv("RERANK_MODE", "single")
+        self.RERANK_SHARD_SIZE: int = int(os.getenv("RERANK_SHARD_SIZE", "8"))
+        self.RERANK_CANDIDATE_TOKENS: int = int(os.getenv("RERANK_CANDIDATE_TOKENS", "60"))
+
 
 settings = Settings()
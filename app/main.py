@@ -1,8 +1,33 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.config.settings import settings
 from app.routers import search, vector_management
+from app.services.upload_job_service import upload_job_service
+from app.services.suggest_service import suggest_service
+from app.services.startup_service import warm_up, close_clients
 
-app = FastAPI(title="Intelligent Search API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warmup_task = None
+    if settings.WARMUP_MODE == "blocking":
+        await warm_up()
+    elif settings.WARMUP_MODE == "background":
+        warmup_task = asyncio.create_task(warm_up())
+    await upload_job_service.start()
+    await suggest_service.start()
+    if settings.WARMUP_MODE != "off":
+        # Building the suggestion index needs the Qdrant client, so it follows the warm-up mode
+        suggest_service.ensure_started()
+    yield
+    await suggest_service.stop()
+    await upload_job_service.stop()
+    if warmup_task and not warmup_task.done():
+        warmup_task.cancel()
+    close_clients()
+
+app = FastAPI(title="Intelligent Search API", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -1,14 +1,57 @@
-from fastapi import APIRouter, HTTPException
-from app.schemas.search_schemas import SearchRequest, SearchResponse
+from typing import Literal, Optional
+from fastapi import APIRouter, HTTPException, Query
+from app.schemas.search_schemas import (
+    SearchRequest, SearchResponse, SearchPageRequest, RecommendRequest, RecommendResponse, SuggestResponse
+)
+from app.services.cache_service import shared_cache
 from app.services.search_service import search_service
+from app.services.suggest_service import suggest_service
 
 router = APIRouter()
 
 @router.post("/search", response_model=SearchResponse)
 async def search_data(request: SearchRequest):
     """Search for events or products"""
+    if request.paginate and shared_cache.backend is None:
+        raise HTTPException(status_code=400, detail="Pagination needs a cache backend; CACHE_BACKEND is off")
     try:
-        result = await search_service.intelligent_search(request.query, request.top_k)
+        result = await search_service.intelligent_search(
+            request.query, request.top_k, request.search_params, request.paginate
+        )
         return result
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+
+@router.post("/search/page", response_model=SearchResponse)
+async def search_page(request: SearchPageRequest):
+    """Next page of a paginated search, without repeating enhancement or retrieval"""
+    try:
+        result = await search_service.search_page(request.cursor, request.page_size)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+    if result is None:
+        raise HTTPException(status_code=404, detail="Cursor expired or unknown; run the search again")
+    return result
+
+@router.post("/recommend", response_model=RecommendResponse)
+async def recommend(request: RecommendRequest):
+    """Items similar to a stored event or product, without LLM calls"""
+    try:
+        results = await search_service.recommend(
+            request.name_space, request.original_id, request.limit,
+            request.time_filter, request.same_audience, request.search_params
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Recommendation failed: {str(e)}")
+    if results is None:
+        raise HTTPException(
+            status_code=404, detail=f"{request.name_space} '{request.original_id}' not found"
+        )
+    return RecommendResponse(results=results, final_count=len(results))
+
+@router.get("/suggest", response_model=SuggestResponse)
+async def suggest(q: str, limit: int = Query(default=8, ge=1, le=20),
+                  name_space: Optional[Literal["event", "product"]] = None):
+    """Typeahead suggestions from the in-process prefix index; no OpenAI or Qdrant calls once it is built"""
+    await suggest_service.ready()
+    return SuggestResponse(suggestions=suggest_service.suggest(q, limit, name_space))
\ No newline at end of file
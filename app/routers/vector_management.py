@@ -1,7 +1,15 @@
 from fastapi import APIRouter, HTTPException
-from app.schemas.vector_management_schemas import UploadRequest, DeleteEntryRequest, DeleteEntryResponse
+from typing import List
+from app.schemas.vector_management_schemas import (
+    UploadRequest, DeleteEntryRequest, DeleteEntryResponse, UploadJobAccepted, UploadJobStatus,
+    BulkDeleteRequest, BulkDeleteResponse, DeleteByFilterRequest, DeleteByFilterResponse
+)
 from app.services.upload_service import upload_service
+from app.services.upload_job_service import upload_job_service
 from app.services.qdrant_service import qdrant_service
+from app.services.suggest_service import suggest_service
+from app.utils.date_utils import to_iso_datetime
+from app.utils.text_preprocessing import normalize_facet
 
 router = APIRouter()
 
@@ -22,6 +30,29 @@ async def upload_data(request: UploadRequest):
         raise HTTPException(status_code=500, detail=f"Failed to upload data: {str(e)}")
 
 
+@router.post("/upload-jobs", response_model=UploadJobAccepted, status_code=202)
+async def create_upload_job(request: UploadRequest):
+    """Persist the upload and process it in the background worker pool"""
+    try:
+        job_id = await upload_job_service.submit(request.data_type, request.data)
+        return UploadJobAccepted(job_id=job_id, status="queued", total=len(request.data))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to queue upload job: {str(e)}")
+
+
+@router.get("/upload-jobs", response_model=List[UploadJobStatus])
+async def list_upload_jobs(limit: int = 50):
+    return await upload_job_service.list_jobs(limit)
+
+
+@router.get("/upload-jobs/{job_id}", response_model=UploadJobStatus)
+async def get_upload_job(job_id: str):
+    status = await upload_job_service.get_status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Upload job '{job_id}' not found")
+    return status
+
+
 @router.post("/delete-entry", response_model=DeleteEntryResponse)
 async def delete_entry(request: DeleteEntryRequest):
     try:
@@ -31,6 +62,8 @@ async def delete_entry(request: DeleteEntryRequest):
         )
         
         deleted = bool(result and (hasattr(result, 'operation_id') or result))
+        if deleted:
+            suggest_service.remove_item(request.name_space, request.original_id)
         
         return DeleteEntryResponse(
             message="Entry deleted successfully" if deleted else "No matching entries found",
@@ -45,3 +78,75 @@ async def delete_entry(request: DeleteEntryRequest):
             status_code=500, 
             detail=f"Failed to delete entry with name_space='{request.name_space}' and original_id='{request.original_id}': {str(e)}"
         )
+
+
+@router.post("/delete-entries", response_model=BulkDeleteResponse)
+async def delete_entries(request: BulkDeleteRequest):
+    """Delete many entries with a handful of batched Qdrant operations"""
+    try:
+        result = await qdrant_service.delete_entries(
+            [(entry.name_space, entry.original_id) for entry in request.entries]
+        )
+        deleted_count = sum(len(ids) for ids in result["deleted"].values())
+        for name_space, original_ids in result["deleted"].items():
+            for original_id in original_ids:
+                suggest_service.remove_item(name_space, original_id)
+        return BulkDeleteResponse(
+            message=f"Deleted {deleted_count} of {len(request.entries)} requested entries",
+            requested=len(request.entries),
+            deleted_count=deleted_count,
+            deleted=result["deleted"],
+            not_found=[
+                DeleteEntryRequest(name_space=name_space, original_id=original_id)
+                for name_space, original_id in result["not_found"]
+            ],
+            operations=result["operations"]
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to delete entries: {str(e)}")
+
+
+def _build_delete_filter(request: DeleteByFilterRequest):
+    from qdrant_client.models import Filter
+    must_filters = []
+    if request.name_space:
+        must_filters.append({"key": "name_space", "match": {"value": request.name_space}})
+    if request.audience:
+        must_filters.append({"key": "audience", "match": {"value": request.audience}})
+    for facet in ("city", "genre", "category", "brand"):
+        if getattr(request, facet):
+            must_filters.append({"key": facet, "match": {"value": normalize_facet(getattr(request, facet))}})
+    if request.start_date_before or request.start_date_after:
+        date_range = {}
+        if request.start_date_before:
+            date_range["lt"] = to_iso_datetime(request.start_date_before)
+        if request.start_date_after:
+            date_range["gt"] = to_iso_datetime(request.start_date_after)
+        must_filters.append({"key": "start_date", "range": date_range})
+    for keyword in request.keywords or []:
+        must_filters.append({"key": "content", "match": {"text": keyword}})
+    return Filter(must=must_filters)
+
+
+@router.post("/delete-by-filter", response_model=DeleteByFilterResponse)
+async def delete_by_filter(request: DeleteByFilterRequest):
+    """Delete every entry matching the given payload conditions in one operation"""
+    query_filter = _build_delete_filter(request)
+    if not query_filter.must:
+        raise HTTPException(status_code=400, detail="At least one filter condition is required")
+    try:
+        matched = await qdrant_service.delete_by_filter(query_filter, dry_run=request.dry_run)
+        if request.dry_run:
+            message = f"{matched} entries match the filter (dry run, nothing deleted)"
+        else:
+            message = f"Deleted {matched} entries matching the filter"
+            if matched:
+                suggest_service.request_refresh()
+        return DeleteByFilterResponse(
+            message=message,
+            matched_count=matched,
+            deleted=bool(matched) and not request.dry_run,
+            dry_run=request.dry_run
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to delete by filter: {str(e)}")
@@ -18,6 +18,26 @@ class QueryEnhancement(BaseModel):
         default=None,
         description="Keyword filter if applicable"
     )
+    city: Optional[str] = Field(
+        default=None,
+        description="City the event takes place in, only if explicitly mentioned (only applicable to events)"
+    )
+    genre: Optional[str] = Field(
+        default=None,
+        description="Event genre, only if explicitly mentioned, e.g. Concert or Comedy (only applicable to events)"
+    )
+    category: Optional[str] = Field(
+        default=None,
+        description="Event or product category, only if explicitly mentioned, e.g. Concerts or T shirt"
+    )
+    brand: Optional[str] = Field(
+        default=None,
+        description="Product brand, only if explicitly mentioned (only applicable to products)"
+    )
+    max_ticket_price: Optional[float] = Field(
+        default=None,
+        description="Highest acceptable ticket price in pounds, 0 for free events (only applicable to events)"
+    )
 
 class RankedResult(BaseModel):
     name_space: Literal["event", "product"] = Field(description="Type of item")
@@ -26,4 +46,12 @@ class RankedResult(BaseModel):
     relevance_reason: str = Field(description="Brief explanation of why this item is relevant")
 
 class RerankedResults(BaseModel):
-    results: List[RankedResult] = Field(description="Top 7 most relevant results")
\ No newline at end of file
+    results: List[RankedResult] = Field(description="Top 7 most relevant results")
+
+class CandidateScore(BaseModel):
+    id: str = Field(description="Short candidate id exactly as given, e.g. c3")
+    score: int = Field(description="Relevance score from 1-10")
+    reason: str = Field(description="A few words explaining the score")
+
+class ShardScores(BaseModel):
+    scores: List[CandidateScore] = Field(description="One score per candidate in the shard")
\ No newline at end of file
@@ -1,10 +1,31 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Any, Dict, List, Literal, Optional
 from app.schemas.query_enchancements_schemas import QueryEnhancement
 
+class SearchParamsOverride(BaseModel):
+    hnsw_ef: Optional[int] = Field(default=None, ge=1, description="HNSW beam size used at query time")
+    exact: Optional[bool] = Field(default=None, description="Bypass the index and run an exact search")
+    indexed_only: Optional[bool] = Field(default=None, description="Only search segments that are already indexed")
+
+
 class SearchRequest(BaseModel):
     query: str
     top_k: int = Field(default=7, ge=1, le=20)
+    search_params: Optional[SearchParamsOverride] = None
+    paginate: bool = Field(default=False, description="Retrieve a deeper candidate list and return a next_cursor")
+
+
+class SearchPageRequest(BaseModel):
+    cursor: str
+    page_size: Optional[int] = Field(default=None, ge=1, le=20, description="Defaults to the first request's top_k")
+
+
+class SearchCursor(BaseModel):
+    """Server-side state behind a pagination cursor"""
+    query: str
+    enhancement: QueryEnhancement
+    page_size: int
+    candidates: List[Dict[str, Any]]
 
 
 class SearchResult(BaseModel):
@@ -14,8 +35,44 @@ class SearchResult(BaseModel):
     payload: dict
     name_space: str
 
+class RecommendRequest(BaseModel):
+    name_space: Literal["event", "product"]
+    original_id: str
+    limit: int = Field(default=7, ge=1, le=50)
+    time_filter: Optional[Literal["past", "future", "today", "this_week", "this_month", "next_week", "next_month"]] = Field(
+        default="future",
+        description="Only applies to events; null recommends past events too"
+    )
+    same_audience: bool = Field(default=True, description="Restrict products to the source item's audience")
+    search_params: Optional[SearchParamsOverride] = None
+
+
+class RecommendResponse(BaseModel):
+    results: List[SearchResult]
+    final_count: int
+
+
+class Suggestion(BaseModel):
+    text: str
+    name_spaces: List[str]
+    item_count: int
+    popularity: int
+
+
+class SuggestResponse(BaseModel):
+    suggestions: List[Suggestion]
+
+
 class SearchResponse(BaseModel):
     results: List[SearchResult]
     enhancement: QueryEnhancement
     total_retrieved: int
-    final_count: int
\ No newline at end of file
+    final_count: int
+    degraded_stages: List[str] = Field(
+        default_factory=list,
+        description="Stages that exceeded their budget or failed and fell back (enhance, embed, search, rerank)"
+    )
+    next_cursor: Optional[str] = Field(
+        default=None,
+        description="Pass to /api/search/page for the next page; None when there are no more candidates"
+    )
\ No newline at end of file
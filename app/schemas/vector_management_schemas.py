@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Optional, Literal
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional, Literal
 
 class EventData(BaseModel):
     id: str
@@ -65,4 +65,60 @@ class DeleteEntryResponse(BaseModel):
     name_space: str
     original_id: str
     deleted: bool
-    operation_result: Optional[dict] = None
\ No newline at end of file
+    operation_result: Optional[dict] = None
+
+
+class BulkDeleteRequest(BaseModel):
+    entries: List[DeleteEntryRequest] = Field(min_length=1)
+
+
+class BulkDeleteResponse(BaseModel):
+    message: str
+    requested: int
+    deleted_count: int
+    deleted: Dict[str, List[str]]
+    not_found: List[DeleteEntryRequest]
+    operations: int
+
+
+class DeleteByFilterRequest(BaseModel):
+    name_space: Optional[Literal["event", "product"]] = None
+    start_date_before: Optional[str] = Field(default=None, description="Delete events starting before this date (dd/mm/YYYY or YYYY-mm-dd)")
+    start_date_after: Optional[str] = Field(default=None, description="Delete events starting after this date (dd/mm/YYYY or YYYY-mm-dd)")
+    audience: Optional[str] = None
+    city: Optional[str] = None
+    genre: Optional[str] = None
+    category: Optional[str] = None
+    brand: Optional[str] = None
+    keywords: Optional[List[str]] = Field(default=None, description="Full-text terms that must all appear in the content")
+    dry_run: bool = Field(default=False, description="Only count the matching points")
+
+
+class DeleteByFilterResponse(BaseModel):
+    message: str
+    matched_count: int
+    deleted: bool
+    dry_run: bool
+
+
+class UploadJobAccepted(BaseModel):
+    job_id: str
+    status: str
+    total: int
+
+
+class UploadJobStatus(BaseModel):
+    job_id: str
+    data_type: str
+    status: Literal["queued", "running", "completed", "failed"]
+    total: int
+    processed_count: int
+    uploaded_count: int
+    failed_count: int
+    failed_ids: List[str]
+    completed_batches: int
+    items_per_second: float
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
\ No newline at end of file
@@ -0,0 +1,229 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Type, TypeVar
+import numpy as np
+from pydantic import BaseModel
+from app.config.settings import settings
+
+M = TypeVar("M", bound=BaseModel)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires_at REAL,
+    accessed_at REAL NOT NULL
+)
+"""
+
+
+class CacheBackend(ABC):
+    """Byte-valued key/value store shared by the worker processes on one host"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl_seconds: Optional[float] = None):
+        pass
+
+    @abstractmethod
+    def delete(self, key: str):
+        pass
+
+    @abstractmethod
+    def clear(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """SQLite file in WAL mode, safe for concurrent readers and writers across processes.
+
+    Entries expire after their TTL and the table is trimmed back to
+    ``max_entries`` least-recently-used rows every ``evict_every`` writes.
+    Access times are refreshed at most once per ``touch_seconds`` so that
+    cache hits rarely turn into writes.
+    """
+
+    def __init__(self, path: str, max_entries: int, evict_every: int = 500, touch_seconds: float = 60.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.evict_every = evict_every
+        self.touch_seconds = touch_seconds
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread, asyncio.to_thread reuses a small pool of threads
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(SCHEMA)
+            connection.execute("CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)")
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def get(self, key: str) -> Optional[bytes]:
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT value, expires_at, accessed_at FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at, accessed_at = row
+        now = time.time()
+        if expires_at is not None and expires_at < now:
+            return None
+        if now - accessed_at > self.touch_seconds:
+            connection.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return value
+
+    def set(self, key: str, value: bytes, ttl_seconds: Optional[float] = None):
+        now = time.time()
+        self._connection().execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, value, now + ttl_seconds if ttl_seconds else None, now)
+        )
+        with self._lock:
+            self._writes += 1
+            evict = self._writes % self.evict_every == 0
+        if evict:
+            self.evict()
+
+    def evict(self):
+        connection = self._connection()
+        connection.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+        (count,) = connection.execute("SELECT COUNT(*) FROM cache").fetchone()
+        if count > self.max_entries:
+            # Trim a little below the limit so eviction does not run on every write
+            excess = count - int(self.max_entries * 0.9)
+            connection.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at LIMIT ?)", (excess,)
+            )
+
+    def delete(self, key: str):
+        self._connection().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        self._connection().execute("DELETE FROM cache")
+
+    def close(self):
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections = []
+        self._local = threading.local()
+
+
+class RedisCacheBackend(CacheBackend):
+    """Redis-compatible server; eviction is left to the server's maxmemory policy"""
+
+    def __init__(self, url: str, prefix: str = "fly-cache:"):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package (pip install redis)") from e
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl_seconds: Optional[float] = None):
+        self.client.set(self.prefix + key, value, ex=int(ttl_seconds) if ttl_seconds else None)
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        for key in self.client.scan_iter(f"{self.prefix}*"):
+            self.client.delete(key)
+
+    def close(self):
+        self.client.close()
+
+
+def build_backend() -> Optional[CacheBackend]:
+    if settings.CACHE_BACKEND == "sqlite":
+        return SQLiteCacheBackend(settings.CACHE_PATH, settings.CACHE_MAX_ENTRIES)
+    if settings.CACHE_BACKEND == "redis":
+        return RedisCacheBackend(settings.CACHE_REDIS_URL)
+    return None
+
+
+class SharedCache:
+    """Typed cache for enhancements, embeddings and rerankings on top of a CacheBackend.
+
+    Cache errors are logged and treated as misses, so a locked or unavailable
+    store never fails a search.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend]):
+        self.backend = backend
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+
+    @staticmethod
+    def make_key(kind: str, *parts) -> str:
+        digest = hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        return f"{kind}:{digest}"
+
+    async def get(self, kind: str, *parts) -> Optional[bytes]:
+        if self.backend is None:
+            return None
+        try:
+            value = await asyncio.to_thread(self.backend.get, self.make_key(kind, *parts))
+        except Exception as e:
+            print(f"Cache read failed for {kind}: {e}")
+            value = None
+        counter = self.misses if value is None else self.hits
+        counter[kind] = counter.get(kind, 0) + 1
+        return value
+
+    async def set(self, kind: str, value: bytes, ttl_seconds: Optional[float], *parts):
+        if self.backend is None:
+            return
+        try:
+            await asyncio.to_thread(self.backend.set, self.make_key(kind, *parts), value, ttl_seconds)
+        except Exception as e:
+            print(f"Cache write failed for {kind}: {e}")
+
+    async def get_model(self, kind: str, model: Type[M], *parts) -> Optional[M]:
+        value = await self.get(kind, *parts)
+        return model.model_validate_json(value) if value is not None else None
+
+    async def set_model(self, kind: str, value: BaseModel, ttl_seconds: Optional[float], *parts):
+        await self.set(kind, value.model_dump_json().encode("utf-8"), ttl_seconds, *parts)
+
+    async def get_embedding(self, *parts) -> Optional[np.ndarray]:
+        value = await self.get("embedding", *parts)
+        return np.frombuffer(value, dtype=np.float32) if value is not None else None
+
+    async def set_embedding(self, embedding: np.ndarray, ttl_seconds: Optional[float], *parts):
+        await self.set("embedding", np.asarray(embedding, dtype=np.float32).tobytes(), ttl_seconds, *parts)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {kind: {"hits": self.hits.get(kind, 0), "misses": self.misses.get(kind, 0)}
+                for kind in sorted(set(self.hits) | set(self.misses))}
+
+    def close(self):
+        if self.backend is not None:
+            self.backend.close()
+
+
+shared_cache = SharedCache(build_backend())
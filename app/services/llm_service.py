@@ -1,24 +1,53 @@
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
+import asyncio
+import re
+from functools import cached_property
+from typing import Dict, List
 from app.config.settings import settings
-from app.schemas.query_enchancements_schemas import QueryEnhancement, RerankedResults
+from app.services.cache_service import shared_cache
+from app.schemas.query_enchancements_schemas import (
+    QueryEnhancement, RerankedResults, RankedResult, ShardScores
+)
+
+# Template boilerplate from text_preprocessing that carries no ranking signal
+COMPACT_REPLACEMENTS = [
+    (r"^This is an event called ", ""),
+    (r"^This is a product named ", ""),
+    (r" which is described as ", ": "),
+    (r" which is ", ": "),
+    (r"\s+", " "),
+]
+
+# Part of the enhancement cache key; bump whenever the enhancement prompt or the
+# QueryEnhancement schema changes so enhancements cached before a deploy are not served
+ENHANCEMENT_VERSION = 2
+
+# Reason given to candidates that kept their vector position because no shard scored them
+UNSCORED_REASON = "Ranked by vector similarity"
 
 class LLMService:
-    def __init__(self):
-        self.query_llm = ChatOpenAI(
+    # Clients and prompt chains are built on first use (or by the startup warm-up)
+    # so importing this module stays cheap on cold start
+    @cached_property
+    def query_llm(self):
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(
             model=settings.LLM_MODEL_ENHANCER,
             temperature=settings.LLM_TEMPERATURE,
             api_key=settings.OPENAI_API_KEY
         )
-        self.reranker = ChatOpenAI(
+
+    @cached_property
+    def reranker(self):
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(
             model=settings.LLM_MODEL_RERANKER,
             temperature=settings.LLM_TEMPERATURE,
             api_key=settings.OPENAI_API_KEY
         )
-    
-    async def enhance_query(self, user_query: str) -> QueryEnhancement:
-        """Enhance user query for better retrieval"""
-        
+
+    @cached_property
+    def enhancement_chain(self):
+        from langchain.prompts import ChatPromptTemplate
         enhancement_prompt = ChatPromptTemplate.from_template("""
         You are a search query enhancement expert. Given a user's search query, your task is to:
         1. Determine what type of items they're looking for (EVENT, PRODUCT, or both)
@@ -28,6 +57,7 @@ class LLMService:
         5. Extract any relevant keywords from the query to filter the results
         6. Extract time filters for events (future, past, today, this_week, this_month, next_week, next_month) if mentioned otherwise set to None
         7. Extract is_weekend for events if mentioned otherwise set to False
+        8. Extract structured facets only if explicitly mentioned, otherwise set to None: city, genre and max_ticket_price for events, brand for products, category for either
         
         
         User Query: {query}
@@ -55,6 +85,8 @@ class LLMService:
         - Time-related words like 'next week', 'today', 'this weekend' should be mapped to appropriate time_filter, NOT added as keyword filters
         - If the query is for a weekend (Saturday or Sunday or weekend key word), set is_weekend to True otherwise set to False
         - Give alot of keywords using synonyms and related words
+        - Facets are exact filters, so use the value as it would appear in the sample text below (e.g. city "Manchester", genre "Concert", category "T shirt", brand "FLY") and don't repeat a facet value in the keywords
+        - "free" or "under £20" style constraints map to max_ticket_price (0 for free)
 
 
         Examples:
@@ -63,6 +95,8 @@ class LLMService:
         - "i love rap music suggest me some events" → search_type: "event", other_keyword_filters: "rap, music, concerts, singing etc"
         - "upcoming concerts next month" → search_type: "event", time_filter: "next_month", other_keyword_filters: ["concerts"]
         - "events happening today" → search_type: "event", time_filter: "today"
+        - "comedy nights in manchester under £15" → search_type: "event", city: "Manchester", genre: "Comedy", max_ticket_price: 15
+        - "FLY t shirts for men" → search_type: "product", audience: "male", brand: "FLY", category: "T shirt"
 
         
         Return your response in the exact JSON format specified by the schema.
@@ -71,25 +105,11 @@ class LLMService:
         Product: This is a product named Tshirt which is Tshirt. It belongs to the T shirt category and is manufactured by the brand FLY. The product type is Unisex and comes in Black color. It is made from Cotton material and features a Casual style. This product is perfect for Casual wear occasions and offers a Regular fit. The design includes a Solid pattern and is ideal for the Summer season. It is targeted towards Unisex audience and includes special features such as Graphic/Logo Detail. The product is tagged with FLY, T shirt, Unisex, Solid.
         Event: This is an event called Live Music Event which is described as The best live music event for creatives. Come join us to discover the best up and coming artists. a night of music, creativity and vibes! last entry - 12am. The event starts on 05/09/2025 at 21:00 and ends on 06/09/2025 at 3:00. It takes place on a Friday during Working Days. The venue is located at Test Address in Manchester, b, United Kingdom with zip code M7 6LD. Tickets are priced at £20.0 and the event is organized by 24-30. This event falls under the Concerts category and has a status of 0. The genre is Concert and is designed for General Audience audience with age restriction of . Special features include Art Display, Live Music and it is an Indoor event. The dress code is and the event will be conducted in English language. This event is suitable for the Autumn season and is tagged with Concerts, Manchester , Concert, Art Display, Live Music.
         """)
-        
-        chain = enhancement_prompt | self.query_llm.with_structured_output(QueryEnhancement)
-        result = await chain.ainvoke({"query": user_query})
-        
-        return result
-    
-    async def rerank_results(self, user_query: str, search_results: list, top_k: int = 7) -> RerankedResults:
-        """Use LLM to rerank search results and return top K"""
+        return enhancement_prompt | self.query_llm.with_structured_output(QueryEnhancement)
 
-        # Prepare results for LLM
-        results_text = ""
-        for i, result in enumerate(search_results, 1):
-            content_preview = result['content'][:300] + "..." if len(result['content']) > 300 else result['content']
-            results_text += f"""
-    Result {i} (ID: {result['original_id']}, Type: {result['name_space']}):
-    {content_preview}
-    ---
-    """
-        
+    @cached_property
+    def reranking_chain(self):
+        from langchain.prompts import ChatPromptTemplate
         reranking_prompt = ChatPromptTemplate.from_template("""
         You are a search result ranking expert. Given a user query and search results, rank the results by relevance.
         
@@ -113,10 +133,69 @@ class LLMService:
         
         Return relevant results in the specified JSON format.
         """)
+        return reranking_prompt | self.reranker.with_structured_output(RerankedResults)
+
+    @cached_property
+    def shard_chain(self):
+        from langchain.prompts import ChatPromptTemplate
+        shard_prompt = ChatPromptTemplate.from_template("""
+        Score how relevant each candidate is to the user query.
+
+        User Query: {query}
+
+        Candidates (id|type|summary), one per line:
+        {candidates}
+
+        Return one entry per candidate with its id exactly as given, a score from 1-10
+        (10 being most relevant) and a reason of at most six words.
+        """)
+        return shard_prompt | self.reranker.with_structured_output(ShardScores)
+    
+    async def enhance_query(self, user_query: str) -> QueryEnhancement:
+        """Enhance user query for better retrieval"""
+        cache_parts = (ENHANCEMENT_VERSION, settings.LLM_MODEL_ENHANCER, " ".join(user_query.lower().split()))
+        cached = await shared_cache.get_model("enhancement", QueryEnhancement, *cache_parts)
+        if cached is not None:
+            return cached
+
+        result = await self.enhancement_chain.ainvoke({"query": user_query})
+        await shared_cache.set_model("enhancement", result, settings.CACHE_TTL_ENHANCEMENT, *cache_parts)
         
-        chain = reranking_prompt | self.reranker.with_structured_output(RerankedResults)
+        return result
+    
+    async def rerank_results(self, user_query: str, search_results: list, top_k: int = 7) -> RerankedResults:
+        """Use LLM to rerank search results and return top K"""
+        # Keyed on the exact candidate set, so any change in retrieval is a miss
+        cache_parts = (
+            settings.RERANK_MODE, settings.LLM_MODEL_RERANKER, user_query, top_k,
+            [(r["name_space"], r["original_id"]) for r in search_results]
+        )
+        cached = await shared_cache.get_model("rerank", RerankedResults, *cache_parts)
+        if cached is not None:
+            return cached
+
+        if settings.RERANK_MODE == "sharded" and len(search_results) > settings.RERANK_SHARD_SIZE:
+            reranked = await self.rerank_results_sharded(user_query, search_results, top_k)
+        else:
+            reranked = await self._rerank_single(user_query, search_results, top_k)
+        # A partial sharded rerank is served but not cached, so a recovered LLM gets to score it
+        if any(result.relevance_reason == UNSCORED_REASON for result in reranked.results):
+            return reranked
+        await shared_cache.set_model("rerank", reranked, settings.CACHE_TTL_RERANK, *cache_parts)
+        return reranked
+
+    async def _rerank_single(self, user_query: str, search_results: list, top_k: int) -> RerankedResults:
+        # Prepare results for LLM
+        results_text = ""
+        for i, result in enumerate(search_results, 1):
+            content_preview = result['content'][:300] + "..." if len(result['content']) > 300 else result['content']
+            results_text += f"""
+    Result {i} (ID: {result['original_id']}, Type: {result['name_space']}):
+    {content_preview}
+    ---
+    """
         
-        reranked = await chain.ainvoke({
+        reranked = await self.reranking_chain.ainvoke({
             "query": user_query,
             "results": results_text,
             "top_k": top_k
@@ -125,4 +204,69 @@ class LLMService:
         
         return reranked
 
+    @staticmethod
+    def encode_candidate(short_id: str, result: Dict, token_budget: int) -> str:
+        """Compact one-line encoding of a candidate, roughly ``token_budget`` tokens long"""
+        text = result['content']
+        for pattern, replacement in COMPACT_REPLACEMENTS:
+            text = re.sub(pattern, replacement, text)
+        char_budget = token_budget * 4
+        if len(text) > char_budget:
+            text = text[:char_budget].rsplit(" ", 1)[0]
+        return f"{short_id}|{result['name_space']}|{text}"
+
+    async def _score_shard(self, user_query: str, lines: List[str]) -> ShardScores:
+        return await self.shard_chain.ainvoke({"query": user_query, "candidates": "\n".join(lines)})
+
+    async def rerank_results_sharded(self, user_query: str, search_results: list, top_k: int = 7) -> RerankedResults:
+        """Score compact candidate shards concurrently and merge them into a global top K.
+
+        Candidates are dealt round-robin in vector order so every shard sees a
+        similar mix of strong and weak matches, which keeps per-shard scores
+        comparable. Ties and candidates from failed shards fall back to vector order;
+        if every shard fails the first error is raised.
+        """
+        short_ids = {f"c{i}": result for i, result in enumerate(search_results, 1)}
+        shard_count = -(-len(search_results) // settings.RERANK_SHARD_SIZE)
+        shards = [[] for _ in range(shard_count)]
+        for i, (short_id, result) in enumerate(short_ids.items()):
+            shards[i % shard_count].append(
+                self.encode_candidate(short_id, result, settings.RERANK_CANDIDATE_TOKENS)
+            )
+
+        shard_results = await asyncio.gather(
+            *(self._score_shard(user_query, lines) for lines in shards),
+            return_exceptions=True
+        )
+
+        failures = [shard_result for shard_result in shard_results if isinstance(shard_result, Exception)]
+        if len(failures) == len(shard_results):
+            raise failures[0]
+
+        scored = {}
+        for shard_result in shard_results:
+            if isinstance(shard_result, Exception):
+                continue
+            for candidate in shard_result.scores:
+                if candidate.id in short_ids and candidate.id not in scored:
+                    scored[candidate.id] = candidate
+
+        order = {short_id: position for position, short_id in enumerate(short_ids)}
+        ranked_ids = sorted(
+            short_ids,
+            key=lambda short_id: (-(scored[short_id].score if short_id in scored else 0), order[short_id])
+        )
+
+        results = []
+        for short_id in ranked_ids[:top_k]:
+            result = short_ids[short_id]
+            candidate = scored.get(short_id)
+            results.append(RankedResult(
+                name_space=result['name_space'],
+                original_id=result['original_id'],
+                relevance_score=candidate.score if candidate else 1,
+                relevance_reason=candidate.reason if candidate else UNSCORED_REASON
+            ))
+        return RerankedResults(results=results)
+
 llm_service = LLMService()
\ No newline at end of file
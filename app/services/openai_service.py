@@ -1,40 +1,82 @@
 import asyncio
+import base64
 import numpy as np
-from typing import List
-from openai import OpenAI
+from functools import cached_property
+from typing import List, Optional
 from app.config.settings import settings
+from app.services.cache_service import shared_cache
+from app.utils.batching import MicroBatcher
+from app.utils.resilience import RateLimiter
+
+def estimate_tokens(texts: List[str]) -> int:
+   # Roughly four characters per token; corrected from the response usage afterwards
+   return sum(len(text) // 4 + 1 for text in texts)
 
 class OpenAIEmbeddingService:
    def __init__(self):
-       self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+       # Shared by search and upload traffic so both stay within one quota
+       self.rate_limiter = RateLimiter(
+           settings.OPENAI_EMBED_RPM / settings.OPENAI_QUOTA_WORKERS,
+           settings.OPENAI_EMBED_TPM / settings.OPENAI_QUOTA_WORKERS
+       )
+       self.batcher = MicroBatcher(
+           self._embed_texts,
+           max_items=settings.EMBED_BATCH_MAX_TEXTS,
+           max_wait=settings.EMBED_BATCH_WINDOW_MS / 1000
+       )
+
+   @cached_property
+   def client(self):
+       # Imported lazily, the openai package is slow to import on cold start
+       from openai import OpenAI
+       return OpenAI(api_key=settings.OPENAI_API_KEY)
+
+   @staticmethod
+   def _decode(embedding: str) -> np.ndarray:
+       # Embeddings are requested as base64 little-endian float32 and viewed in place
+       return np.frombuffer(base64.b64decode(embedding), dtype=np.float32)
+
+   async def _embed_texts(self, texts: List[str], out: Optional[np.ndarray] = None) -> np.ndarray:
+       """One rate-limited API call; rows are written into ``out`` when given"""
+       estimated = estimate_tokens(texts)
+       await self.rate_limiter.acquire(estimated)
+       response = await asyncio.to_thread(
+           self.client.embeddings.create,
+           input=texts,
+           model=settings.EMBEDDING_MODEL_NAME,
+           encoding_format="base64"
+       )
+       if response.usage:
+           self.rate_limiter.record_usage(estimated, response.usage.prompt_tokens)
+
+       if out is None:
+           out = np.empty((len(texts), settings.EMBEDDING_DIMENSION), dtype=np.float32)
+       for data in response.data:
+           out[data.index] = self._decode(data.embedding)
+       return out
       
    async def get_text_embedding(self, text: str) -> np.ndarray:
-       def _get_embedding():
-           response = self.client.embeddings.create(
-               input=text,
-               model=settings.EMBEDDING_MODEL_NAME
-           )
-           return np.array(response.data[0].embedding)
-       
-       return await asyncio.to_thread(_get_embedding)
+       cached = await shared_cache.get_embedding(settings.EMBEDDING_MODEL_NAME, text)
+       if cached is not None:
+           return cached
+
+       # Concurrent searches are coalesced into one batched call
+       if settings.EMBED_BATCH_WINDOW_MS > 0:
+           embedding = await self.batcher.submit(text)
+       else:
+           embedding = (await self._embed_texts([text]))[0]
+       await shared_cache.set_embedding(embedding, settings.CACHE_TTL_EMBEDDING, settings.EMBEDDING_MODEL_NAME, text)
+       return embedding
   
-   async def get_batch_embeddings(self, texts: List[str], batch_size: int = 32) -> List[np.ndarray]:
-       def _get_batch_embeddings():
-           embeddings = []
-          
-           for i in range(0, len(texts), batch_size):
-               batch_texts = texts[i:i + batch_size]
-              
-               response = self.client.embeddings.create(
-                   input=batch_texts,
-                   model=settings.EMBEDDING_MODEL_NAME
-               )
-               
-               batch_embeddings = [np.array(data.embedding) for data in response.data]
-               embeddings.extend(batch_embeddings)
-          
-           return embeddings
-       
-       return await asyncio.to_thread(_get_batch_embeddings)
+   async def get_batch_embeddings(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+       """Embed texts into one contiguous float32 array of shape (len(texts), EMBEDDING_DIMENSION)"""
+       embeddings = np.empty((len(texts), settings.EMBEDDING_DIMENSION), dtype=np.float32)
+       for i in range(0, len(texts), batch_size):
+           await self._embed_texts(texts[i:i + batch_size], out=embeddings[i:i + batch_size])
+       return embeddings
+
+   def close(self):
+       if "client" in self.__dict__:
+           self.client.close()
 
 openai_embedding_service = OpenAIEmbeddingService()
\ No newline at end of file
@@ -1,21 +1,64 @@
 import asyncio
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct, Filter
-from qdrant_client.http import models
-from qdrant_client.http.exceptions import UnexpectedResponse
-from qdrant_client.models import Filter, FieldCondition, MatchValue
+from functools import cached_property
 from app.config.settings import settings
-from typing import List
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+# qdrant_client is imported lazily: it accounts for a large share of cold-start time
+if TYPE_CHECKING:
+    import numpy as np
+    from qdrant_client import QdrantClient
+    from qdrant_client.http import models
+
+# Typed facet fields, matched with indexed must conditions instead of full-text content filters
+FACET_INDEXES = {
+    "city": "keyword",
+    "genre": "keyword",
+    "category": "keyword",
+    "brand": "keyword",
+    "ticket_price": "float",
+}
 
 class QdrantService:
-    def __init__(self):
-        self.client = QdrantClient(
+    def __init__(self, client: Optional["QdrantClient"] = None):
+        if client is not None:
+            self.client = client
+        self.collection_name = settings.COLLECTION_NAME
+
+    @cached_property
+    def client(self) -> "QdrantClient":
+        from qdrant_client import QdrantClient
+        return QdrantClient(
             url=settings.QDRANT_URL,
-            api_key=settings.QDRANT_API_KEY
+            api_key=settings.QDRANT_API_KEY,
+            prefer_grpc=settings.QDRANT_PREFER_GRPC,
+            grpc_port=settings.QDRANT_GRPC_PORT
         )
-        self.collection_name = settings.COLLECTION_NAME
+
+    def close(self):
+        if "client" in self.__dict__:
+            self.client.close()
+
+    def build_search_params(self, hnsw_ef: Optional[int] = None, exact: Optional[bool] = None,
+                            indexed_only: Optional[bool] = None) -> "models.SearchParams":
+        """Merge per-request overrides with the configured search parameters"""
+        from qdrant_client.http import models
+        return models.SearchParams(
+            hnsw_ef=hnsw_ef if hnsw_ef is not None else settings.QDRANT_HNSW_EF,
+            exact=exact if exact is not None else settings.QDRANT_EXACT_SEARCH,
+            indexed_only=indexed_only if indexed_only is not None else settings.QDRANT_INDEXED_ONLY
+        )
+
+    def build_hnsw_config(self, m: Optional[int] = None, ef_construct: Optional[int] = None) -> Optional["models.HnswConfigDiff"]:
+        from qdrant_client.http import models
+        m = m if m is not None else settings.QDRANT_HNSW_M
+        ef_construct = ef_construct if ef_construct is not None else settings.QDRANT_HNSW_EF_CONSTRUCT
+        if m is None and ef_construct is None:
+            return None
+        return models.HnswConfigDiff(m=m, ef_construct=ef_construct)
    
     async def create_collection(self):
+        from qdrant_client.http import models
+        from qdrant_client.http.exceptions import UnexpectedResponse
         try:
             
             await asyncio.to_thread(
@@ -30,10 +73,11 @@ class QdrantService:
             await asyncio.to_thread(
                 self.client.create_collection,
                 collection_name=self.collection_name,
-                vectors_config=VectorParams(
+                vectors_config=models.VectorParams(
                     size=settings.EMBEDDING_DIMENSION,
-                    distance=Distance.COSINE
-                )
+                    distance=models.Distance.COSINE
+                ),
+                hnsw_config=self.build_hnsw_config()
             )
            
             await asyncio.to_thread(
@@ -74,27 +118,135 @@ class QdrantService:
                 field_name="event_on",
                 field_schema=models.PayloadSchemaType.KEYWORD
             )
+            await self.create_facet_indexes()
             
             print(f"Collection '{self.collection_name}' created successfully with indexes.")
    
-    async def upsert_points(self, points: List[PointStruct]):
+    async def create_facet_indexes(self):
+        """Index the typed facet fields; safe to run again on an existing collection"""
+        from qdrant_client.http import models
+        for field_name, schema in FACET_INDEXES.items():
+            await asyncio.to_thread(
+                self.client.create_payload_index,
+                collection_name=self.collection_name,
+                field_name=field_name,
+                field_schema=models.PayloadSchemaType(schema)
+            )
+   
+    async def upsert_points(self, points: List["models.PointStruct"]):
         await asyncio.to_thread(
             self.client.upsert,
             collection_name=self.collection_name,
             points=points
         )
+
+
+    async def upsert_vectors(self, ids: List[str], vectors: "np.ndarray", payloads: List[Dict]):
+        """Upsert a float32 vector matrix row-aligned with ids and payloads, without a PointStruct per row"""
+        await asyncio.to_thread(
+            self.client.upload_collection,
+            collection_name=self.collection_name,
+            vectors=vectors,
+            payload=payloads,
+            ids=ids,
+            batch_size=max(1, len(ids)),
+            wait=True
+        )
    
-    async def search(self, query_embedding, limit: int = 15, query_filter: Filter = None):
+    async def search(self, query_embedding, limit: int = 15, query_filter: "models.Filter" = None,
+                     search_params: "models.SearchParams" = None):
         return await asyncio.to_thread(
             self.client.query_points,
             collection_name=self.collection_name,
             query=query_embedding,
             limit=limit,
             score_threshold=settings.SCORING_THRESHOLD,
-            query_filter=query_filter
+            query_filter=query_filter,
+            search_params=search_params or self.build_search_params()
+        )
+
+    async def find_point(self, name_space: str, original_id: str):
+        """The stored point for (name_space, original_id) with its payload, or None"""
+        from qdrant_client.models import Filter, FieldCondition, MatchValue
+        points, _ = await asyncio.to_thread(
+            self.client.scroll,
+            collection_name=self.collection_name,
+            scroll_filter=Filter(
+                must=[
+                    FieldCondition(key="name_space", match=MatchValue(value=name_space)),
+                    FieldCondition(key="original_id", match=MatchValue(value=original_id))
+                ]
+            ),
+            limit=1,
+            with_payload=True,
+            with_vectors=False
+        )
+        return points[0] if points else None
+
+    async def scroll_payloads(self, fields: List[str], batch_size: int = 1000,
+                              scroll_filter: "models.Filter" = None) -> list:
+        """Selected payload fields of every point (or every point matching the filter), without vectors"""
+        def _scroll_all():
+            records, offset = [], None
+            while True:
+                points, offset = self.client.scroll(
+                    collection_name=self.collection_name,
+                    scroll_filter=scroll_filter,
+                    limit=batch_size,
+                    offset=offset,
+                    with_payload=fields,
+                    with_vectors=False
+                )
+                records.extend(points)
+                if offset is None:
+                    return records
+
+        return await asyncio.to_thread(_scroll_all)
+
+    async def scroll_points(self, limit: int = 1000, offset=None):
+        """One page of points with vectors and payloads; returns (points, next_offset)"""
+        return await asyncio.to_thread(
+            self.client.scroll,
+            collection_name=self.collection_name,
+            limit=limit,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True
+        )
+
+    async def set_payloads(self, updates: List[Tuple[str, Dict]]):
+        """Merge payload fields into many points with one batched request"""
+        from qdrant_client.http import models
+        await asyncio.to_thread(
+            self.client.batch_update_points,
+            collection_name=self.collection_name,
+            update_operations=[
+                models.SetPayloadOperation(set_payload=models.SetPayload(payload=payload, points=[point_id]))
+                for point_id, payload in updates
+            ]
+        )
+
+    async def collection_info(self):
+        return await asyncio.to_thread(self.client.get_collection, collection_name=self.collection_name)
+
+    async def count_points(self) -> int:
+        result = await asyncio.to_thread(self.client.count, collection_name=self.collection_name, exact=True)
+        return result.count
+
+    async def set_indexing_threshold(self, threshold: int):
+        """0 pauses HNSW indexing, e.g. during a bulk load; indexing catches up once it is raised again"""
+        from qdrant_client.http import models
+        await asyncio.to_thread(
+            self.client.update_collection,
+            collection_name=self.collection_name,
+            optimizers_config=models.OptimizersConfigDiff(indexing_threshold=threshold)
         )
 
+    async def delete_collection(self):
+        await asyncio.to_thread(self.client.delete_collection, collection_name=self.collection_name)
+
     async def delete_entry(self, name_space: str, original_id: str):
+        from qdrant_client.models import Filter, FieldCondition, MatchValue
         search_result = await asyncio.to_thread(
         self.client.scroll,
         collection_name=self.collection_name,
@@ -122,4 +274,81 @@ class QdrantService:
         )    
         return result
 
+    async def delete_entries(self, entries: List[Tuple[str, str]], chunk_size: int = 1000) -> Dict:
+        """Delete many (name_space, original_id) pairs with a few batched calls.
+
+        Ids are grouped per namespace and matched with MatchAny, so each chunk
+        costs one scroll (to report what exists) and one delete by point id.
+        """
+        from qdrant_client.http import models
+        from qdrant_client.models import Filter, FieldCondition, MatchValue, MatchAny
+        ids_by_namespace: Dict[str, List[str]] = {}
+        for name_space, original_id in entries:
+            ids_by_namespace.setdefault(name_space, []).append(str(original_id))
+
+        deleted: Dict[str, List[str]] = {}
+        operations = 0
+        for name_space, original_ids in ids_by_namespace.items():
+            unique_ids = list(dict.fromkeys(original_ids))
+            for start in range(0, len(unique_ids), chunk_size):
+                chunk = unique_ids[start:start + chunk_size]
+                chunk_filter = Filter(must=[
+                    FieldCondition(key="name_space", match=MatchValue(value=name_space)),
+                    FieldCondition(key="original_id", match=MatchAny(any=chunk))
+                ])
+
+                point_ids, offset = [], None
+                while True:
+                    points, offset = await asyncio.to_thread(
+                        self.client.scroll,
+                        collection_name=self.collection_name,
+                        scroll_filter=chunk_filter,
+                        limit=chunk_size,
+                        offset=offset,
+                        with_payload=["original_id"],
+                        with_vectors=False
+                    )
+                    operations += 1
+                    point_ids.extend(points)
+                    if offset is None:
+                        break
+
+                if not point_ids:
+                    continue
+                await asyncio.to_thread(
+                    self.client.delete,
+                    collection_name=self.collection_name,
+                    points_selector=models.PointIdsList(points=[point.id for point in point_ids])
+                )
+                operations += 1
+                deleted.setdefault(name_space, []).extend(
+                    dict.fromkeys(point.payload["original_id"] for point in point_ids)
+                )
+
+        deleted_sets = {name_space: set(ids) for name_space, ids in deleted.items()}
+        not_found = [
+            (name_space, original_id)
+            for name_space, original_ids in ids_by_namespace.items()
+            for original_id in dict.fromkeys(original_ids)
+            if original_id not in deleted_sets.get(name_space, set())
+        ]
+        return {"deleted": deleted, "not_found": not_found, "operations": operations}
+
+    async def delete_by_filter(self, query_filter: "models.Filter", dry_run: bool = False) -> int:
+        """Delete every point matching the filter; returns how many points matched"""
+        from qdrant_client.http import models
+        count_result = await asyncio.to_thread(
+            self.client.count,
+            collection_name=self.collection_name,
+            count_filter=query_filter,
+            exact=True
+        )
+        if count_result.count and not dry_run:
+            await asyncio.to_thread(
+                self.client.delete,
+                collection_name=self.collection_name,
+                points_selector=models.FilterSelector(filter=query_filter)
+            )
+        return count_result.count
+
 qdrant_service = QdrantService()
\ No newline at end of file
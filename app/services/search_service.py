@@ -1,15 +1,33 @@
+import asyncio
+import secrets
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, TYPE_CHECKING
 from abc import ABC, abstractmethod
-from qdrant_client.http.models import Filter, MinShould
 from app.services.qdrant_service import qdrant_service
 from app.services.llm_service import llm_service
 from app.schemas.query_enchancements_schemas import QueryEnhancement
-from app.schemas.search_schemas import SearchResponse
+from app.schemas.search_schemas import SearchResponse, SearchParamsOverride, SearchCursor
+from app.services.cache_service import shared_cache
+from app.services.suggest_service import suggest_service
 from app.utils.date_utils import get_date_range
+from app.utils.text_preprocessing import normalize_facet
 from app.services.openai_service import openai_embedding_service
+from app.config.settings import settings
+from app.utils.resilience import CircuitBreaker, CircuitOpenError, RequestBudget, hedged
 embedding_service = openai_embedding_service
 
+if TYPE_CHECKING:
+    from qdrant_client.http.models import Filter
+
+# A filtered search is accepted once it returns more than this many points
+MIN_RESULTS_PER_TYPE = 5
+
+# Candidates per namespace retrieved per search and handed to the reranker per page
+RERANK_WINDOW = 15
+
+# QueryEnhancement fields matched against the keyword facet indexes
+FACET_FIELDS = ("city", "genre", "category", "brand")
+
 class FilterStrategy(ABC):
     @abstractmethod
     def build_filters(self, enhancement: QueryEnhancement) -> Tuple[List[Dict], List[Dict]]:
@@ -23,6 +41,36 @@ class BaseFilterStrategy(FilterStrategy):
             "female": {"key": "audience", "match": {"value": "Women"}},
             "unisex": {"key": "audience", "match": {"value": "Unisex"}}
         }
+        # Facets this namespace stores, applied as indexed must conditions
+        self.facet_fields: Tuple[str, ...] = ()
+        self.price_filter = False
+
+    def _facet_filters(self, enhancement: QueryEnhancement) -> List[Dict]:
+        filters = [
+            {"key": field, "match": {"value": normalize_facet(getattr(enhancement, field))}}
+            for field in self.facet_fields
+            if getattr(enhancement, field, None)
+        ]
+        if self.price_filter and enhancement.max_ticket_price is not None:
+            filters.append({"key": "ticket_price", "range": {"lte": enhancement.max_ticket_price}})
+        return filters
+
+    def relax_facets(self, enhancement: QueryEnhancement) -> Optional[QueryEnhancement]:
+        """The enhancement with this namespace's facets moved to full-text keyword filters.
+
+        Facets match exactly, so a value the LLM phrased differently from the
+        catalogue ("concerts" vs "concert") finds nothing; the keyword filters
+        are matched on content and relaxed step by step. None if no facet applied.
+        """
+        values = [getattr(enhancement, field) for field in self.facet_fields if getattr(enhancement, field, None)]
+        has_price = self.price_filter and enhancement.max_ticket_price is not None
+        if not values and not has_price:
+            return None
+        return enhancement.model_copy(update={
+            **{field: None for field in FACET_FIELDS},
+            "max_ticket_price": None,
+            "other_keyword_filters": list(dict.fromkeys((enhancement.other_keyword_filters or []) + values))
+        })
 
     def build_filters(self, enhancement: QueryEnhancement) -> Tuple[List[Dict], List[Dict]]:
         must_filters = []
@@ -31,6 +79,8 @@ class BaseFilterStrategy(FilterStrategy):
         if enhancement.audience in self.audience_filters:
             must_filters.append(self.audience_filters[enhancement.audience])
 
+        must_filters.extend(self._facet_filters(enhancement))
+
         if enhancement.other_keyword_filters:
             should_filters.extend(
                 {"key": "content", "match": {"text": text_filter}}
@@ -44,6 +94,8 @@ class EventFilterStrategy(BaseFilterStrategy):
         super().__init__()
         self.namespace_filter = {"key": "name_space", "match": {"value": "event"}}
         self.weekend_filter = {"key": "event_on", "match": {"value": "weekend"}}
+        self.facet_fields = ("city", "genre", "category")
+        self.price_filter = True
 
     def _build_time_filter(self, time_filter: Optional[str]) -> Optional[Dict]:
         if not time_filter:
@@ -79,6 +131,7 @@ class ProductFilterStrategy(BaseFilterStrategy):
     def __init__(self):
         super().__init__()
         self.namespace_filter = {"key": "name_space", "match": {"value": "product"}}
+        self.facet_fields = ("category", "brand")
 
     def build_filters(self, enhancement: QueryEnhancement) -> Tuple[List[Dict], List[Dict]]:
         must_filters, should_filters = super().build_filters(enhancement)
@@ -118,6 +171,30 @@ class ResultFormatter:
             formatted_results.append(formatted_result)
         return formatted_results
 
+    @staticmethod
+    def matches_conditions(payload: Dict, conditions: List[Dict]) -> bool:
+        """Client-side check of must conditions as built by the filter strategies (value and range)"""
+        for condition in conditions:
+            value = payload.get(condition["key"])
+            if "match" in condition:
+                if value != condition["match"]["value"]:
+                    return False
+                continue
+            if value is None or value == "":
+                return False
+            bounds = condition["range"]
+            try:
+                if isinstance(value, str):
+                    # start_date payloads and bounds are ISO datetimes
+                    value = datetime.fromisoformat(value.replace("Z", ""))
+                    bounds = {op: datetime.fromisoformat(bound.replace("Z", "")) for op, bound in bounds.items()}
+            except ValueError:
+                return False
+            if ("gte" in bounds and value < bounds["gte"]) or ("gt" in bounds and value <= bounds["gt"]) \
+                    or ("lte" in bounds and value > bounds["lte"]) or ("lt" in bounds and value >= bounds["lt"]):
+                return False
+        return True
+
     @staticmethod
     def extract_points(search_results):
         if hasattr(search_results, "points"):
@@ -128,11 +205,36 @@ class ResultFormatter:
             return search_results
 
 class SearchService:
-    def __init__(self):
+    def __init__(self, llm=llm_service, embedder=embedding_service, vector_store=qdrant_service):
+        self.llm = llm
+        self.embedder = embedder
+        self.vector_store = vector_store
         self.search_handler = SearchTypeHandler()
         self.formatter = ResultFormatter()
+        self.breakers = {
+            name: CircuitBreaker(name, settings.CIRCUIT_FAILURE_THRESHOLD, settings.CIRCUIT_RESET_SECONDS)
+            for name in ("enhancer", "embeddings", "qdrant", "reranker")
+        }
+
+    async def _embed(self, text: str, budget: Optional[RequestBudget] = None):
+        """Embed a query; under a budget the call is hedged, time-boxed and circuit-broken"""
+        if budget is None:
+            return await self.embedder.get_text_embedding(text)
+        return await self.breakers["embeddings"].call(
+            lambda: hedged(lambda: self.embedder.get_text_embedding(text), settings.EMBED_HEDGE_DELAY_SECONDS),
+            budget.stage_timeout(settings.EMBED_BUDGET)
+        )
+
+    async def _vector_search(self, budget: Optional[RequestBudget] = None, **kwargs):
+        if budget is None:
+            return await self.vector_store.search(**kwargs)
+        return await self.breakers["qdrant"].call(
+            lambda: self.vector_store.search(**kwargs),
+            budget.stage_timeout(settings.VECTOR_SEARCH_BUDGET)
+        )
 
-    def _build_query_filter(self, enhancement: QueryEnhancement, search_type: str) -> Filter:
+    def _build_query_filter(self, enhancement: QueryEnhancement, search_type: str) -> "Filter":
+        from qdrant_client.http.models import Filter, MinShould
         strategy = self.search_handler.get_strategy(search_type)
         must_filters, should_filters = strategy.build_filters(enhancement)
         
@@ -142,44 +244,68 @@ class SearchService:
         )
 
     async def _search_with_type(self, enhancement: QueryEnhancement, search_type: str, 
-                               limit: int, query_embedding: List[float]) -> List[Dict]:
-        """Perform search for a specific type with retry logic"""
+                               limit: int, query_embedding: List[float], search_params=None,
+                               budget: Optional[RequestBudget] = None) -> List[Dict]:
+        """Perform search for a specific type with retry logic.
+
+        Facets stay as must conditions while the keyword filters are relaxed;
+        only if that finds nothing are they retried as keyword filters.
+        """
         min_count = min(3, len(enhancement.other_keyword_filters or []))
+        points = []
         
         while min_count >= 0:
             try:
                 query_filter = self._build_query_filter(enhancement, search_type)
                 query_filter.min_should.min_count = min_count
+                if min_count == 0:
+                    query_filter.min_should = None
 
-                search_results = await qdrant_service.search(
+                search_results = await self._vector_search(
+                    budget,
                     query_embedding=query_embedding,
                     limit=limit,
-                    query_filter=query_filter
+                    query_filter=query_filter,
+                    search_params=search_params
                 )
                
                 points = self.formatter.extract_points(search_results)
                 
-                threshold = 5
-                if len(points) > threshold:
+                if len(points) > MIN_RESULTS_PER_TYPE:
                     break
 
                 min_count -= 1
+            except (asyncio.TimeoutError, CircuitOpenError):
+                if budget:
+                    budget.mark_degraded("search")
+                return self.formatter.format_search_results(points)
             except Exception as e:
                 min_count -= 1
                 continue
+
+        if not points:
+            relaxed = self.search_handler.get_strategy(search_type).relax_facets(enhancement)
+            if relaxed is not None:
+                return await self._search_with_type(relaxed, search_type, limit, query_embedding,
+                                                    search_params, budget)
         
         return self.formatter.format_search_results(points)
 
-    async def enhanced_semantic_search(self, enhancement: QueryEnhancement, limit: int = 15) -> List[Dict]:
+    async def enhanced_semantic_search(self, enhancement: QueryEnhancement, limit: int = 15,
+                                       search_params=None, budget: Optional[RequestBudget] = None) -> List[Dict]:
         try:
             if enhancement.search_type == 'event':
-                event_query_embedding = await embedding_service.get_text_embedding(enhancement.event_enhanced_query)
+                event_query_embedding = await self._embed(enhancement.event_enhanced_query, budget)
             elif enhancement.search_type == 'product':
-                product_query_embedding = await embedding_service.get_text_embedding(enhancement.product_enhanced_query)
+                product_query_embedding = await self._embed(enhancement.product_enhanced_query, budget)
             else:
-                event_query_embedding = await embedding_service.get_text_embedding(enhancement.event_enhanced_query)
-                product_query_embedding = await embedding_service.get_text_embedding(enhancement.product_enhanced_query)
+                event_query_embedding, product_query_embedding = await asyncio.gather(
+                    self._embed(enhancement.event_enhanced_query, budget),
+                    self._embed(enhancement.product_enhanced_query, budget)
+                )
         except Exception as e:
+            if budget:
+                budget.mark_degraded("embed")
             return []
 
         search_types = self.search_handler.get_search_types(enhancement.search_type)
@@ -196,68 +322,342 @@ class SearchService:
                     query_embedding = event_query_embedding
                 elif search_type == 'product':
                     query_embedding = product_query_embedding
-                results = await self._search_with_type(enhancement, search_type, type_limit, query_embedding)
+                results = await self._search_with_type(enhancement, search_type, type_limit, query_embedding, search_params, budget)
                 all_results.extend(results)
             
             all_results.sort(key=lambda x: x["score"], reverse=True)
             return all_results
         
-        return await self._search_with_type(enhancement, search_types[0], limit, event_query_embedding if search_types[0] == 'event' else product_query_embedding)
+        return await self._search_with_type(enhancement, search_types[0], limit, event_query_embedding if search_types[0] == 'event' else product_query_embedding, search_params, budget)
+
+    async def _speculative_search(self, user_query: str, limit: int, search_params=None,
+                                  budget: Optional[RequestBudget] = None) -> List[Dict]:
+        """Embed the raw query and run an unfiltered search while the query is being enhanced"""
+        query_embedding = await self._embed(user_query, budget)
+        search_results = await self._vector_search(
+            budget,
+            query_embedding=query_embedding,
+            limit=limit,
+            search_params=search_params
+        )
+        return self.formatter.format_search_results(self.formatter.extract_points(search_results))
+
+    async def _reuse_speculative_results(self, speculative_task: asyncio.Task, enhancement: QueryEnhancement,
+                                         limit: int) -> Optional[List[Dict]]:
+        """Return the speculative candidates that pass the enhancement's filters, or None if too few do.
+
+        The strategy's must conditions (namespace, audience, weekend, dates and
+        facets) are checked against the candidate payloads. Keyword filters are
+        only should conditions that the filtered search relaxes anyway, so here
+        they are left to the reranker, which sees the full query.
+        """
+        try:
+            candidates = await speculative_task
+        except Exception:
+            return None
+
+        search_types = self.search_handler.get_search_types(enhancement.search_type)
+        results = []
+        for search_type in search_types:
+            must_filters, _ = self.search_handler.get_strategy(search_type).build_filters(enhancement)
+            typed = [
+                c for c in candidates if self.formatter.matches_conditions(c["payload"], must_filters)
+            ][:limit]
+            if len(typed) <= MIN_RESULTS_PER_TYPE:
+                return None
+            results.extend(typed)
+
+        results.sort(key=lambda x: x["score"], reverse=True)
+        return results
+
+    @staticmethod
+    def merge_reranked_results(reranked_results, search_results: List[Dict]) -> List[Dict]:
+        """Attach payloads from the retrieved candidates to the reranked results"""
+        final_results = []
+        for ranked_result in reranked_results.results:
+            for search_result in search_results:
+                if (search_result['original_id'] == ranked_result.original_id and 
+                    search_result['name_space'] == ranked_result.name_space):
+                    final_results.append({
+                        "original_id": ranked_result.original_id,
+                        "relevance_score": ranked_result.relevance_score,
+                        "relevance_reason": ranked_result.relevance_reason,
+                        "payload": search_result['payload'],
+                        "name_space": search_result['name_space']
+                    })
+                    break
+        return final_results
+
+    @staticmethod
+    def vector_order_results(search_results: List[Dict], top_k: int) -> List[Dict]:
+        """Fallback when reranking is unavailable: keep the vector order and scale scores to 1-10"""
+        return [
+            {
+                "original_id": search_result['original_id'],
+                "relevance_score": max(1, min(10, round(search_result['score'] * 10))),
+                "relevance_reason": "Ranked by vector similarity",
+                "payload": search_result['payload'],
+                "name_space": search_result['name_space']
+            }
+            for search_result in search_results[:top_k]
+        ]
 
-    async def intelligent_search(self, user_query: str, return_top_k: int = 7) -> SearchResponse:
-        """Perform an intelligent search with query enhancement and reranking."""
+    @staticmethod
+    def fallback_enhancement(user_query: str) -> QueryEnhancement:
+        """Unfiltered raw-query enhancement used when the enhancer is unavailable"""
+        return QueryEnhancement(
+            event_enhanced_query=user_query,
+            product_enhanced_query=user_query,
+            search_type="both",
+            audience=None,
+            time_filter=None,
+            is_weekend=False,
+            other_keyword_filters=[]
+        )
+
+    async def _rerank(self, user_query: str, search_results: List[Dict], top_k: int,
+                      budget: RequestBudget) -> List[Dict]:
+        try:
+            reranked_results = await self.breakers["reranker"].call(
+                lambda: self.llm.rerank_results(user_query, search_results, top_k=top_k),
+                budget.stage_timeout()
+            )
+            return self.merge_reranked_results(reranked_results, search_results)
+        except Exception as e:
+            budget.mark_degraded("rerank")
+            return self.vector_order_results(search_results, top_k)
+
+    @staticmethod
+    def first_window(search_results: List[Dict], per_namespace: int) -> List[Dict]:
+        """The first ``per_namespace`` candidates of each namespace, keeping the overall order"""
+        taken: Dict[str, int] = {}
+        window = []
+        for result in search_results:
+            if taken.get(result["name_space"], 0) < per_namespace:
+                taken[result["name_space"]] = taken.get(result["name_space"], 0) + 1
+                window.append(result)
+        return window
+
+    @staticmethod
+    def adaptive_depth(scores: List[float], has_keywords: bool, floor: int, ceiling: int) -> int:
+        """How many of one namespace's candidates (sorted by score) are worth reranking.
+
+        A sharp drop between neighbouring scores within the default window cuts
+        the list there; a flat score curve on a keyword query goes as deep as
+        the ceiling allows, since the vector order says little about which
+        candidates match; anything else gets the default RERANK_WINDOW. Only
+        the flat keyword case is ever deeper than the default.
+        """
+        scores = scores[:max(floor, ceiling)]
+        if len(scores) <= floor:
+            return len(scores)
+        default = min(max(floor, RERANK_WINDOW), len(scores))
+        top = scores[0]
+        if top > 0:
+            cuts = range(floor, min(len(scores), default + 1))
+            if cuts:
+                drop, cut = max((scores[i - 1] - scores[i], i) for i in cuts)
+                if drop / top >= settings.ADAPTIVE_CUTOFF_DROP:
+                    return cut
+            if has_keywords and (top - scores[-1]) / top <= settings.ADAPTIVE_FLAT_SPREAD:
+                return len(scores)
+        return default
+
+    def adaptive_window(self, search_results: List[Dict], has_keywords: bool, top_k: int) -> List[Dict]:
+        """Candidates for the reranker, sized per namespace by adaptive_depth within RERANK_MAX_CANDIDATES"""
+        by_namespace: Dict[str, List[Dict]] = {}
+        for result in search_results:
+            by_namespace.setdefault(result["name_space"], []).append(result)
+        floor = max(settings.RERANK_MIN_CANDIDATES, top_k)
+        ceiling = max(floor, settings.RERANK_MAX_CANDIDATES // max(1, len(by_namespace)))
+        keep = set()
+        for results in by_namespace.values():
+            depth = self.adaptive_depth([r["score"] for r in results], has_keywords, floor, ceiling)
+            keep.update(id(r) for r in results[:depth])
+        return [result for result in search_results if id(result) in keep]
+
+    async def _save_cursor(self, user_query: str, enhancement: QueryEnhancement, page_size: int,
+                           candidates: List[Dict], window: List[Dict], served: List[Dict]) -> Optional[str]:
+        """Store the candidates not served yet under a new cursor id; None when nothing is left.
+
+        Candidates the reranker passed over stay in the pool for the next page,
+        unless nothing in the window was served, in which case the window is dropped.
+        """
+        dropped = {(result["name_space"], result["original_id"]) for result in served or window}
+        remaining = [c for c in candidates if (c["name_space"], c["original_id"]) not in dropped]
+        if not remaining or shared_cache.backend is None:
+            return None
+        cursor_id = secrets.token_urlsafe(16)
+        cursor = SearchCursor(query=user_query, enhancement=enhancement, page_size=page_size, candidates=remaining)
+        await shared_cache.set_model("cursor", cursor, settings.CURSOR_TTL_SECONDS, cursor_id)
+        return cursor_id
+
+    async def search_page(self, cursor_id: str, page_size: Optional[int] = None) -> Optional[SearchResponse]:
+        """Next page of a paginated search: reranks the next window of stored candidates.
+
+        Enhancement and retrieval are not repeated, so a page costs at most
+        one reranker call. Returns None when the cursor is unknown or expired.
+        """
+        cursor = await shared_cache.get_model("cursor", SearchCursor, cursor_id)
+        if cursor is None:
+            return None
+        budget = RequestBudget(settings.SEARCH_DEADLINE_SECONDS)
+        top_k = page_size or cursor.page_size
+        if cursor.enhancement.search_type == 'both':
+            top_k *= 2
+        window = self.first_window(cursor.candidates, RERANK_WINDOW)
+        final_results = await self._rerank(cursor.query, window, top_k, budget)
+        next_cursor = await self._save_cursor(
+            cursor.query, cursor.enhancement, cursor.page_size, cursor.candidates, window, final_results
+        )
+        return SearchResponse(
+            results=final_results,
+            enhancement=cursor.enhancement,
+            total_retrieved=len(cursor.candidates),
+            final_count=len(final_results),
+            degraded_stages=budget.degraded,
+            next_cursor=next_cursor
+        )
+
+    async def recommend(self, name_space: str, original_id: str, limit: int = 7,
+                        time_filter: Optional[str] = "future", same_audience: bool = True,
+                        search_params: Optional[SearchParamsOverride] = None) -> Optional[List[Dict]]:
+        """Items similar to a stored one, searched with its stored vector (no LLM or embedding calls).
+
+        Results go through the same filter strategy as a search of that type.
+        Returns None when the source item does not exist.
+        """
+        from qdrant_client.http.models import Filter, FieldCondition, MatchValue
+        source = await self.vector_store.find_point(name_space, original_id)
+        if source is None:
+            return None
+
+        audience = None
+        if same_audience:
+            audience_filters = self.search_handler.get_strategy(name_space).audience_filters
+            audience = next(
+                (key for key, condition in audience_filters.items()
+                 if condition["match"]["value"] == source.payload.get("audience")),
+                None
+            )
+        enhancement = QueryEnhancement(
+            event_enhanced_query="",
+            product_enhanced_query="",
+            search_type=name_space,
+            audience=audience,
+            time_filter=time_filter if name_space == "event" else None,
+            is_weekend=False,
+            other_keyword_filters=[]
+        )
+        query_filter = self._build_query_filter(enhancement, name_space)
+        query_filter.min_should = None
+        # Excludes the source and any duplicate points stored for the same item
+        query_filter.must_not = [Filter(must=[
+            FieldCondition(key="name_space", match=MatchValue(value=name_space)),
+            FieldCondition(key="original_id", match=MatchValue(value=original_id))
+        ])]
+
+        search_results = await self.vector_store.search(
+            query_embedding=source.id,
+            limit=limit,
+            query_filter=query_filter,
+            search_params=self.vector_store.build_search_params(
+                **(search_params.model_dump() if search_params else {})
+            )
+        )
+        points = self.formatter.extract_points(search_results)
+        return self.vector_order_results(self.formatter.format_search_results(points), limit)
+
+    async def intelligent_search(self, user_query: str, return_top_k: int = 7,
+                                 search_params: Optional[SearchParamsOverride] = None,
+                                 paginate: bool = False) -> SearchResponse:
+        """Perform an intelligent search with query enhancement and reranking.
+
+        The request runs under SEARCH_DEADLINE_SECONDS. A slow or failing
+        enhancer falls back to the raw query, a slow or failing reranker falls
+        back to vector order, and the response lists the degraded stages.
+        With ``paginate``, PAGINATION_DEPTH candidates are retrieved, the first
+        window is reranked and the rest is kept under ``next_cursor``. With
+        ADAPTIVE_DEPTH, the reranker window is sized from the score curve.
+        """
+        suggest_service.record_query(user_query)
         enhancement = None
+        page_size = return_top_k
+        retrieval_limit = RERANK_WINDOW
+        if settings.ADAPTIVE_DEPTH:
+            retrieval_limit = max(retrieval_limit, settings.RERANK_MAX_CANDIDATES)
+        if paginate:
+            retrieval_limit = max(retrieval_limit, settings.PAGINATION_DEPTH)
+        budget = RequestBudget(settings.SEARCH_DEADLINE_SECONDS)
+        qdrant_search_params = self.vector_store.build_search_params(
+            **(search_params.model_dump() if search_params else {})
+        )
+        speculative_task = None
+        if settings.SPECULATIVE_RETRIEVAL:
+            speculative_task = asyncio.create_task(
+                self._speculative_search(user_query, settings.SPECULATIVE_LIMIT, qdrant_search_params, budget)
+            )
         try:
-            enhancement = await llm_service.enhance_query(user_query)
+            try:
+                enhancement = await self.breakers["enhancer"].call(
+                    lambda: self.llm.enhance_query(user_query),
+                    budget.stage_timeout(settings.ENHANCE_BUDGET)
+                )
+            except Exception as e:
+                budget.mark_degraded("enhance")
+                enhancement = self.fallback_enhancement(user_query)
             
-            search_results = await self.enhanced_semantic_search(enhancement, limit=15)
+            search_results = None
+            if speculative_task:
+                search_results = await self._reuse_speculative_results(
+                    speculative_task, enhancement, limit=retrieval_limit
+                )
+            if search_results is None:
+                search_results = await self.enhanced_semantic_search(
+                    enhancement, limit=retrieval_limit, search_params=qdrant_search_params, budget=budget
+                )
             if not search_results:
                 return SearchResponse(
                     results=[],
                     enhancement=enhancement,
                     total_retrieved=0,
-                    final_count=0
+                    final_count=0,
+                    degraded_stages=budget.degraded
                 )
             if enhancement.search_type == 'both':
                 return_top_k *= 2
-            reranked_results = await llm_service.rerank_results(user_query, search_results, top_k=return_top_k)
-
-            final_results = []
-            for ranked_result in reranked_results.results:
-                for search_result in search_results:
-                    if (search_result['original_id'] == ranked_result.original_id and 
-                        search_result['name_space'] == ranked_result.name_space):
-                        final_results.append({
-                            "original_id": ranked_result.original_id,
-                            "relevance_score": ranked_result.relevance_score,
-                            "relevance_reason": ranked_result.relevance_reason,
-                            "payload": search_result['payload'],
-                            "name_space": search_result['name_space']
-                        })
-                        break
+            if settings.ADAPTIVE_DEPTH:
+                window = self.adaptive_window(search_results, bool(enhancement.other_keyword_filters), page_size)
+            else:
+                window = self.first_window(search_results, RERANK_WINDOW)
+            final_results = await self._rerank(user_query, window, return_top_k, budget)
+
+            next_cursor = None
+            if paginate:
+                next_cursor = await self._save_cursor(
+                    user_query, enhancement, page_size, search_results, window, final_results
+                )
 
             return SearchResponse(
                 results=final_results,
                 enhancement=enhancement,
                 total_retrieved=len(search_results),
-                final_count=len(final_results)
+                final_count=len(final_results),
+                degraded_stages=budget.degraded,
+                next_cursor=next_cursor
             )
         except Exception as e:
+            if speculative_task and not speculative_task.done():
+                speculative_task.cancel()
             if enhancement is None:
-                enhancement = QueryEnhancement(
-                    enhanced_query=user_query,
-                    search_type="both",
-                    audience=None,
-                    other_keyword_filters=None,
-                    time_filter=None,
-                    is_weekend=False
-                )
+                enhancement = self.fallback_enhancement(user_query)
             
             return SearchResponse(
                 results=[],
                 enhancement=enhancement,
                 total_retrieved=0,
-                final_count=0
+                final_count=0,
+                degraded_stages=budget.degraded
             )
 
 search_service = SearchService()
\ No newline at end of file
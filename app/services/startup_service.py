@@ -0,0 +1,49 @@
+import asyncio
+import time
+from typing import Callable, Dict, List, Tuple
+from app.config.settings import settings
+from app.services.qdrant_service import qdrant_service
+from app.services.openai_service import openai_embedding_service
+from app.services.llm_service import llm_service
+from app.services.cache_service import shared_cache
+
+# Milliseconds spent in each warm-up step of the current process
+startup_timings: Dict[str, float] = {}
+
+
+def _warmup_steps() -> List[Tuple[str, Callable]]:
+    steps = [
+        ("qdrant_client", lambda: qdrant_service.client),
+        ("openai_client", lambda: openai_embedding_service.client),
+        ("llm_clients", lambda: (llm_service.query_llm, llm_service.reranker)),
+        ("prompt_chains", lambda: (llm_service.enhancement_chain, llm_service.reranking_chain, llm_service.shard_chain)),
+    ]
+    if settings.WARMUP_CONNECTIONS:
+        steps += [
+            ("qdrant_connection", lambda: qdrant_service.client.get_collection(qdrant_service.collection_name)),
+            ("openai_connection", lambda: openai_embedding_service.client.models.retrieve(settings.EMBEDDING_MODEL_NAME)),
+        ]
+    return steps
+
+
+async def warm_up():
+    """Import and construct the clients, pre-build prompt chains and optionally pre-open connections.
+
+    Each step runs in a worker thread so a background warm-up does not block
+    requests that arrive meanwhile; failures are logged and never fatal.
+    """
+    started = time.perf_counter()
+    for name, step in _warmup_steps():
+        step_started = time.perf_counter()
+        try:
+            await asyncio.to_thread(step)
+        except Exception as e:
+            print(f"Warm-up step '{name}' failed: {e}")
+        startup_timings[name] = (time.perf_counter() - step_started) * 1000
+    startup_timings["warmup_total"] = (time.perf_counter() - started) * 1000
+
+
+def close_clients():
+    qdrant_service.close()
+    openai_embedding_service.close()
+    shared_cache.close()
@@ -0,0 +1,242 @@
+import asyncio
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.config.settings import settings
+from app.services.qdrant_service import qdrant_service
+from app.utils.text_preprocessing import suggest_terms_from_content
+
+# Upper bound on index entries inspected per lookup, keeps one-letter prefixes cheap
+SCAN_LIMIT = 500
+
+
+def normalize_term(text: str) -> str:
+    return " ".join(str(text).lower().split())
+
+
+def _word_suffixes(term: str) -> List[str]:
+    words = term.split()
+    return [" ".join(words[i:]) for i in range(len(words))]
+
+
+class PrefixIndex:
+    """Sorted array of (key, term) pairs searched with bisect.
+
+    Every word-start suffix of a term is a key, so "mus" finds "Live Music".
+    Terms are reference-counted per namespace by the items that carry them and
+    disappear once the last such item is removed.
+    """
+
+    def __init__(self):
+        self._entries: List[Tuple[str, str]] = []
+        self.display: Dict[str, str] = {}
+        self.item_counts: Dict[str, Dict[str, int]] = {}
+        self.items: Dict[Tuple[str, str], List[str]] = {}
+
+    @classmethod
+    def from_items(cls, items: Iterable[Tuple[str, str, List[str]]]) -> "PrefixIndex":
+        """Bulk build, sorting once instead of inserting term by term"""
+        index = cls()
+        for name_space, original_id, terms in items:
+            index._register(name_space, original_id, terms)
+        index._entries = sorted(
+            (key, term) for term in index.item_counts for key in _word_suffixes(term)
+        )
+        return index
+
+    def _register(self, name_space: str, original_id: str, terms: List[str]) -> List[str]:
+        """Count the item's terms; returns the terms that are new to the index"""
+        new_terms = []
+        normalized_terms = []
+        for text in terms:
+            term = normalize_term(text)
+            if not term or term in normalized_terms:
+                continue
+            normalized_terms.append(term)
+            counts = self.item_counts.setdefault(term, {})
+            if not counts:
+                new_terms.append(term)
+                self.display[term] = str(text).strip()
+            counts[name_space] = counts.get(name_space, 0) + 1
+        self.items[(name_space, original_id)] = normalized_terms
+        return new_terms
+
+    def add_item(self, name_space: str, original_id: str, terms: List[str]):
+        self.remove_item(name_space, original_id)
+        for term in self._register(name_space, original_id, terms):
+            for key in _word_suffixes(term):
+                insort(self._entries, (key, term))
+
+    def remove_item(self, name_space: str, original_id: str):
+        for term in self.items.pop((name_space, original_id), []):
+            counts = self.item_counts[term]
+            counts[name_space] -= 1
+            if counts[name_space] == 0:
+                del counts[name_space]
+            if counts:
+                continue
+            del self.item_counts[term]
+            del self.display[term]
+            for key in _word_suffixes(term):
+                position = bisect_left(self._entries, (key, term))
+                if position < len(self._entries) and self._entries[position] == (key, term):
+                    del self._entries[position]
+
+    def search(self, prefix: str, limit: int, popularity: Dict[str, int],
+               name_space: Optional[str] = None) -> List[Dict]:
+        prefix = normalize_term(prefix)
+        if not prefix:
+            return []
+        matches: Dict[str, bool] = {}
+        start = bisect_left(self._entries, (prefix,))
+        for key, term in self._entries[start:start + SCAN_LIMIT]:
+            if not key.startswith(prefix):
+                break
+            if name_space and name_space not in self.item_counts[term]:
+                continue
+            # True when the prefix matches the start of the term, not a later word
+            matches[term] = matches.get(term, False) or key == term
+
+        def rank(term: str):
+            counts = self.item_counts[term]
+            item_count = counts.get(name_space, 0) if name_space else sum(counts.values())
+            return (-popularity.get(term, 0), not matches[term], -item_count, len(term), term)
+
+        return [
+            {
+                "text": self.display[term],
+                "name_spaces": sorted(self.item_counts[term]),
+                "item_count": sum(self.item_counts[term].values()),
+                "popularity": popularity.get(term, 0),
+            }
+            for term in sorted(matches, key=rank)[:limit]
+        ]
+
+
+class SuggestService:
+    """Typeahead suggestions answered from an in-process prefix index.
+
+    Uploads and deletes in this process update the index immediately; the
+    index is also rebuilt from the suggest_terms payloads in Qdrant every
+    SUGGEST_REFRESH_SECONDS so that changes made by other workers show up.
+    The first build is deferred until the first suggestion request, or the
+    startup warm-up, so that a cold start does not scroll the collection.
+    Popularity counts searches whose query equals a term and is per process.
+    """
+
+    def __init__(self, vector_store=qdrant_service, refresh_seconds: float = 300.0):
+        self.vector_store = vector_store
+        self.refresh_seconds = refresh_seconds
+        self.index = PrefixIndex()
+        self.popularity: Dict[str, int] = {}
+        self._refresh_requested = asyncio.Event()
+        self._built = asyncio.Event()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._running = False
+        # add_item/remove_item calls made while a rebuild runs, replayed on the new index
+        self._pending_changes: Optional[List[Tuple[str, str, Optional[List[str]]]]] = None
+
+    async def start(self):
+        self._refresh_requested = asyncio.Event()
+        self._built = asyncio.Event()
+        self._running = True
+
+    def ensure_started(self):
+        """Start the refresh loop, which builds the index right away, unless it is already running"""
+        if self._running and self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def ready(self):
+        """Wait for the first build, starting it if needed"""
+        self.ensure_started()
+        if self._refresh_task is not None:
+            await self._built.wait()
+
+    async def stop(self):
+        self._running = False
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+            self._refresh_task = None
+
+    def request_refresh(self):
+        """Rebuild soon, e.g. after a delete whose affected items are not known"""
+        self._refresh_requested.set()
+
+    async def _refresh_loop(self):
+        while True:
+            self._refresh_requested.clear()
+            try:
+                await self.rebuild()
+            except Exception as e:
+                print(f"Failed to rebuild suggestion index: {e}")
+            # Set after a failed build too, so waiting requests get the (possibly empty) index
+            self._built.set()
+            try:
+                await asyncio.wait_for(self._refresh_requested.wait(), self.refresh_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def rebuild(self):
+        """Build a new index from Qdrant and swap it in.
+
+        Uploads and deletes made while the scroll and build run are recorded and
+        replayed on the new index, which may not have seen them, before the swap.
+        """
+        self._pending_changes = []
+        try:
+            new_index = await self._build_index()
+            for name_space, original_id, terms in self._pending_changes:
+                if terms is None:
+                    new_index.remove_item(name_space, original_id)
+                else:
+                    new_index.add_item(name_space, original_id, terms)
+            self.index = new_index
+        finally:
+            self._pending_changes = None
+
+    async def _build_index(self) -> PrefixIndex:
+        from qdrant_client.http.models import Filter, IsEmptyCondition, PayloadField
+        no_terms = IsEmptyCondition(is_empty=PayloadField(key="suggest_terms"))
+        records = await self.vector_store.scroll_payloads(
+            ["name_space", "original_id", "suggest_terms"], scroll_filter=Filter(must_not=[no_terms])
+        )
+        # Content is only fetched for points uploaded before suggest_terms were stored
+        legacy_records = await self.vector_store.scroll_payloads(
+            ["name_space", "original_id", "content"], scroll_filter=Filter(must=[no_terms])
+        )
+
+        def _build():
+            return PrefixIndex.from_items(
+                [
+                    (record.payload.get("name_space", ""), str(record.payload.get("original_id")),
+                     record.payload.get("suggest_terms") or [])
+                    for record in records
+                ] + [
+                    (record.payload.get("name_space", ""), str(record.payload.get("original_id")),
+                     suggest_terms_from_content(record.payload.get("content", "")))
+                    for record in legacy_records
+                ]
+            )
+
+        return await asyncio.to_thread(_build)
+
+    def add_item(self, name_space: str, original_id: str, terms: List[str]):
+        self.index.add_item(name_space, str(original_id), terms)
+        if self._pending_changes is not None:
+            self._pending_changes.append((name_space, str(original_id), list(terms)))
+
+    def remove_item(self, name_space: str, original_id: str):
+        self.index.remove_item(name_space, str(original_id))
+        if self._pending_changes is not None:
+            self._pending_changes.append((name_space, str(original_id), None))
+
+    def record_query(self, query: str):
+        term = normalize_term(query)
+        if term in self.index.item_counts:
+            self.popularity[term] = self.popularity.get(term, 0) + 1
+
+    def suggest(self, prefix: str, limit: int = 8, name_space: Optional[str] = None) -> List[Dict]:
+        return self.index.search(prefix, limit, self.popularity, name_space)
+
+
+suggest_service = SuggestService(refresh_seconds=settings.SUGGEST_REFRESH_SECONDS)
@@ -0,0 +1,239 @@
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from app.config.settings import settings
+from app.services.upload_service import upload_service
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS upload_jobs (
+    id TEXT PRIMARY KEY,
+    data_type TEXT NOT NULL,
+    data TEXT NOT NULL,
+    status TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    batch_size INTEGER NOT NULL,
+    next_batch INTEGER NOT NULL DEFAULT 0,
+    uploaded_count INTEGER NOT NULL DEFAULT 0,
+    failed_ids TEXT NOT NULL DEFAULT '[]',
+    error TEXT,
+    lease_owner TEXT,
+    lease_expires_at REAL,
+    processing_seconds REAL NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+)
+"""
+
+STATUS_COLUMNS = (
+    "id, data_type, status, total, batch_size, next_batch, uploaded_count, failed_ids, "
+    "error, processing_seconds, created_at, started_at, finished_at"
+)
+
+
+class UploadJobStore:
+    """SQLite-backed job table, which doubles as the work queue.
+
+    Jobs are claimed with a lease that is renewed after every batch, so several
+    worker processes can share the table and a job whose owner died is picked
+    up again from its last completed batch once the lease expires.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @contextmanager
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.row_factory = sqlite3.Row
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def initialize(self):
+        # The file normally lives on a mounted volume, which may not contain the directory yet
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(SCHEMA)
+
+    def create(self, data_type: str, data: List[Dict], batch_size: int) -> str:
+        job_id = uuid.uuid4().hex
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT INTO upload_jobs (id, data_type, data, status, total, batch_size, created_at) "
+                "VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, data_type, json.dumps(data), len(data), batch_size, time.time())
+            )
+        return job_id
+
+    def claim_next(self, owner: str, lease_seconds: float) -> Optional[sqlite3.Row]:
+        now = time.time()
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                "SELECT id FROM upload_jobs WHERE status = 'queued' "
+                "OR (status = 'running' AND lease_expires_at < ?) ORDER BY created_at LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                "UPDATE upload_jobs SET status = 'running', lease_owner = ?, lease_expires_at = ?, "
+                "started_at = COALESCE(started_at, ?) WHERE id = ?",
+                (owner, now + lease_seconds, now, row["id"])
+            )
+            return connection.execute("SELECT * FROM upload_jobs WHERE id = ?", (row["id"],)).fetchone()
+
+    def record_batch(self, job_id: str, owner: str, next_batch: int, uploaded: int,
+                     failed_ids: List[str], seconds: float, lease_seconds: float) -> bool:
+        """Checkpoint a completed batch; returns False if the lease was lost to another worker"""
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                "SELECT failed_ids FROM upload_jobs WHERE id = ? AND lease_owner = ?", (job_id, owner)
+            ).fetchone()
+            if row is None:
+                return False
+            connection.execute(
+                "UPDATE upload_jobs SET next_batch = ?, uploaded_count = uploaded_count + ?, failed_ids = ?, "
+                "processing_seconds = processing_seconds + ?, lease_expires_at = ? WHERE id = ?",
+                (next_batch, uploaded, json.dumps(json.loads(row["failed_ids"]) + failed_ids),
+                 seconds, time.time() + lease_seconds, job_id)
+            )
+            return True
+
+    def finish(self, job_id: str, owner: str, status: str, error: Optional[str] = None):
+        """Mark the job finished and drop its items; only the status columns are kept"""
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE upload_jobs SET status = ?, error = ?, finished_at = ?, data = '[]', lease_owner = NULL, "
+                "lease_expires_at = NULL WHERE id = ? AND lease_owner = ?",
+                (status, error, time.time(), job_id, owner)
+            )
+
+    def requeue(self, job_id: str, owner: str):
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE upload_jobs SET status = 'queued', lease_owner = NULL, lease_expires_at = NULL "
+                "WHERE id = ? AND lease_owner = ?",
+                (job_id, owner)
+            )
+
+    def get(self, job_id: str) -> Optional[sqlite3.Row]:
+        with self._connect() as connection:
+            return connection.execute(
+                f"SELECT {STATUS_COLUMNS} FROM upload_jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+
+    def list(self, limit: int = 50) -> List[sqlite3.Row]:
+        with self._connect() as connection:
+            return connection.execute(
+                f"SELECT {STATUS_COLUMNS} FROM upload_jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+
+
+class UploadJobService:
+    def __init__(self, store: UploadJobStore, workers: int, lease_seconds: float, poll_seconds: float = 2.0):
+        self.store = store
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        """Start the worker pool; queued and orphaned jobs are resumed automatically"""
+        await asyncio.to_thread(self.store.initialize)
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, data_type: str, data: List[Dict]) -> str:
+        job_id = await asyncio.to_thread(self.store.create, data_type, data, upload_service.batch_size)
+        self._wakeup.set()
+        return job_id
+
+    async def get_status(self, job_id: str) -> Optional[Dict]:
+        row = await asyncio.to_thread(self.store.get, job_id)
+        return self._to_status(row) if row else None
+
+    async def list_jobs(self, limit: int = 50) -> List[Dict]:
+        rows = await asyncio.to_thread(self.store.list, limit)
+        return [self._to_status(row) for row in rows]
+
+    @staticmethod
+    def _to_status(row: sqlite3.Row) -> Dict:
+        processed = min(row["total"], row["next_batch"] * row["batch_size"])
+        return {
+            "job_id": row["id"],
+            "data_type": row["data_type"],
+            "status": row["status"],
+            "total": row["total"],
+            "processed_count": processed,
+            "uploaded_count": row["uploaded_count"],
+            "failed_count": len(json.loads(row["failed_ids"])),
+            "failed_ids": json.loads(row["failed_ids"]),
+            "completed_batches": row["next_batch"],
+            "items_per_second": round(row["uploaded_count"] / row["processing_seconds"], 2)
+            if row["processing_seconds"] else 0.0,
+            "error": row["error"],
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+        }
+
+    async def _worker(self):
+        while True:
+            job = await asyncio.to_thread(self.store.claim_next, self.owner, self.lease_seconds)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run_job(job)
+
+    async def _run_job(self, job: sqlite3.Row):
+        job_id, batch_size = job["id"], job["batch_size"]
+        data = json.loads(job["data"])
+        try:
+            for batch_index in range(job["next_batch"], -(-len(data) // batch_size)):
+                started = time.perf_counter()
+                batch = data[batch_index * batch_size:(batch_index + 1) * batch_size]
+                uploaded, failed_ids = await upload_service.upload_batch(job["data_type"], batch, id_seed=job_id)
+                still_owner = await asyncio.to_thread(
+                    self.store.record_batch, job_id, self.owner, batch_index + 1, uploaded,
+                    failed_ids, time.perf_counter() - started, self.lease_seconds
+                )
+                if not still_owner:
+                    return
+            await asyncio.to_thread(self.store.finish, job_id, self.owner, "completed")
+        except asyncio.CancelledError:
+            # Shutting down: hand the job back so the next start resumes it from the last checkpoint
+            self.store.requeue(job_id, self.owner)
+            raise
+        except Exception as e:
+            await asyncio.to_thread(self.store.finish, job_id, self.owner, "failed", str(e))
+
+
+upload_job_service = UploadJobService(
+    UploadJobStore(settings.UPLOAD_JOB_DB_PATH),
+    workers=settings.UPLOAD_JOB_WORKERS,
+    lease_seconds=settings.UPLOAD_JOB_LEASE_SECONDS
+)
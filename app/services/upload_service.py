@@ -1,12 +1,12 @@
-from typing import List, Dict, Callable, Optional
-from datetime import datetime
+from typing import List, Dict, Callable, Optional, Tuple
 import uuid
-from qdrant_client.models import PointStruct
+import numpy as np
 from app.services.qdrant_service import qdrant_service
-from app.utils.text_preprocessing import prepare_event_text, prepare_product_text
-from app.utils.date_utils import is_weekend
+from app.utils.text_preprocessing import prepare_event_text, prepare_product_text, prepare_suggest_terms, prepare_facets
+from app.utils.date_utils import is_weekend, to_iso_datetime
 from app.config.settings import settings
 from app.services.openai_service import openai_embedding_service
+from app.services.suggest_service import suggest_service
 embedding_service = openai_embedding_service
 
 class UploadService:
@@ -19,52 +19,38 @@ class UploadService:
 
     def _parse_date(self, start_date: Optional[str]) -> str:
         """Parse date string to ISO format."""
-        if not start_date:
-            return ""
-        try:
-            if isinstance(start_date, str):
-                if "/" in start_date:
-                    parsed_date = datetime.strptime(start_date, "%d/%m/%Y")
-                elif "-" in start_date and "T" in start_date:
-                    parsed_date = datetime.fromisoformat(start_date.replace("Z", ""))
-                else:
-                    parsed_date = datetime.strptime(start_date, "%Y-%m-%d")
-                return parsed_date.strftime("%Y-%m-%dT%H:%M:%SZ")
-            elif hasattr(start_date, 'strftime'):
-                return start_date.strftime("%Y-%m-%dT%H:%M:%SZ")
-            else:
-                return str(start_date)
-        except (ValueError, TypeError) as e:
-            return str(start_date)
-
-    async def _process_batch(self, data_type: str, data: List[Dict], start_idx: int, end_idx: int) -> List[PointStruct]:
-        batch = data[start_idx:end_idx]
+        return to_iso_datetime(start_date)
+
+    async def _process_batch(self, data_type: str, data: List[Dict], start_idx: int, end_idx: int,
+                             id_seed: Optional[str] = None) -> Tuple[List[str], Optional[np.ndarray], List[Dict]]:
+        """Embed a slice of items; returns point ids, their vectors as one float32 matrix and payloads"""
+        batch = [item for item in data[start_idx:end_idx] if isinstance(item, dict) and "id" in item]
         texts = []
         processor = self.text_processors.get(data_type)
         if not processor:
-            return []
+            return [], None, []
 
         try:
             for item in batch:
-                if not isinstance(item, dict) or "id" not in item:
-                    continue
                 text = processor(item)
                 texts.append(text)
         except Exception as e:
-            return []
+            return [], None, []
 
         try:
             embeddings = await embedding_service.get_batch_embeddings(texts)
         except Exception as e:
-            return []
+            return [], None, []
 
-        points = []
+        ids, payloads, rows = [], [], []
         for idx, item in enumerate(batch):
             try:
                 payload = {
                     "name_space": data_type,
                     "original_id": str(item.get("id")),
-                    "content": texts[idx]
+                    "content": texts[idx],
+                    "suggest_terms": prepare_suggest_terms(item, data_type),
+                    **prepare_facets(item, data_type)
                 }
                 if data_type == "event":
                     start_date = self._parse_date(item.get("start_date"))
@@ -75,17 +61,40 @@ class UploadService:
                 else:
                     payload["audience"] = item.get("audience")
 
-                unique_id = str(uuid.uuid4())
-                point = PointStruct(
-                    id=unique_id,
-                    vector=embeddings[idx],
-                    payload=payload
-                )
-                points.append(point)
+                if id_seed:
+                    # Deterministic ids make re-running an interrupted batch overwrite, not duplicate
+                    unique_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"{id_seed}:{data_type}:{item.get('id')}"))
+                else:
+                    unique_id = str(uuid.uuid4())
+                ids.append(unique_id)
+                payloads.append(payload)
+                rows.append(idx)
             except Exception as e:
                 continue
 
-        return points
+        # Only copy the matrix when some items had to be dropped
+        vectors = embeddings if len(rows) == len(batch) else embeddings[rows]
+        return ids, vectors, payloads
+
+    async def upload_batch(self, data_type: str, batch: List[Dict], id_seed: Optional[str] = None) -> Tuple[int, List[str]]:
+        """Embed and upsert one batch. Returns (uploaded count, ids of items that failed)"""
+        ids, vectors, payloads = await self._process_batch(data_type, batch, 0, len(batch), id_seed)
+        uploaded_ids = set()
+        if ids:
+            try:
+                await qdrant_service.upsert_vectors(ids, vectors, payloads)
+                uploaded_ids = {payload["original_id"] for payload in payloads}
+                for payload in payloads:
+                    suggest_service.add_item(data_type, payload["original_id"], payload["suggest_terms"])
+            except Exception as e:
+                pass
+
+        failed_ids = [
+            str(item.get("id")) if isinstance(item, dict) else str(item)
+            for item in batch
+            if not (isinstance(item, dict) and str(item.get("id")) in uploaded_ids)
+        ]
+        return len(ids) if uploaded_ids else 0, failed_ids
 
     async def process_and_upload_data(self, data_type: str, data: List[Dict]) -> Dict:
         if not data or data_type not in self.text_processors:
@@ -94,20 +103,12 @@ class UploadService:
                 "count": 0
             }
 
-        all_points = []
         total_count = 0
 
         for start_idx in range(0, len(data), self.batch_size):
             end_idx = min(start_idx + self.batch_size, len(data))
-            batch_points = await self._process_batch(data_type, data, start_idx, end_idx)
-
-            if batch_points:
-                try:
-                    await qdrant_service.upsert_points(batch_points)
-                    all_points.extend(batch_points)
-                    total_count += len(batch_points)
-                except Exception as e:
-                    continue
+            uploaded, _ = await self.upload_batch(data_type, data[start_idx:end_idx])
+            total_count += uploaded
 
         message = f"Successfully uploaded {total_count} {data_type}s"
         if total_count < len(data):
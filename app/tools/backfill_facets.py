@@ -0,0 +1,76 @@
+"""Facet backfill tool.
+
+Points uploaded before typed facets were stored only carry their embedded
+``content``. This parses city, genre, category, brand and ticket_price back
+out of that text, writes them as payload fields (never overwriting a stored
+value) and makes sure the facet indexes exist. Vectors are untouched, so no
+embeddings are requested.
+
+Usage:
+    python -m app.tools.backfill_facets --dry-run
+    python -m app.tools.backfill_facets --page-size 500
+"""
+import argparse
+import asyncio
+from collections import Counter
+
+from qdrant_client import QdrantClient
+
+from app.services.qdrant_service import FACET_INDEXES, QdrantService, qdrant_service
+from app.utils.text_preprocessing import facets_from_content
+
+
+async def backfill(store: QdrantService, page_size: int, dry_run: bool) -> Counter:
+    if not dry_run:
+        await store.create_facet_indexes()
+
+    filled = Counter()
+    scanned = updated = 0
+    offset = None
+    while True:
+        points, offset = await asyncio.to_thread(
+            store.client.scroll,
+            collection_name=store.collection_name,
+            limit=page_size,
+            offset=offset,
+            with_payload=["name_space", "content", *FACET_INDEXES],
+            with_vectors=False
+        )
+        updates = []
+        for point in points:
+            payload = point.payload or {}
+            missing = {
+                facet: value
+                for facet, value in facets_from_content(payload.get("content", ""), payload.get("name_space", "")).items()
+                if facet not in payload and value is not None
+            }
+            if missing:
+                updates.append((point.id, missing))
+                filled.update(missing.keys())
+        if updates and not dry_run:
+            await store.set_payloads(updates)
+        scanned += len(points)
+        updated += len(updates)
+        print(f"Scanned {scanned} points, {updated} {'to update' if dry_run else 'updated'}")
+        if offset is None:
+            break
+
+    for facet in FACET_INDEXES:
+        print(f"{facet:<14} {filled[facet]:>8}")
+    return filled
+
+
+async def main(args):
+    store = QdrantService(QdrantClient(path=args.qdrant_path)) if args.qdrant_path else qdrant_service
+    try:
+        await backfill(store, args.page_size, args.dry_run)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill typed facet payloads from stored content")
+    parser.add_argument("--page-size", type=int, default=500, help="Points per scroll and payload update")
+    parser.add_argument("--dry-run", action="store_true", help="Only count what would be filled")
+    parser.add_argument("--qdrant-path", help="Use an on-disk local Qdrant instead of QDRANT_URL")
+    asyncio.run(main(parser.parse_args()))
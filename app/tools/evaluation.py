@@ -0,0 +1,214 @@
+"""Offline retrieval-quality and latency evaluation harness.
+
+Runs a golden set of queries through enhancement, embedding, vector search and
+reranking and reports recall@k, nDCG@k and per-stage latency for one or more
+variants side by side. LLM and embedding responses are replayed from a
+cassette so runs are repeatable and need no OpenAI access; pair it with
+``--qdrant-path`` to run against a local Qdrant copy of the collection.
+
+Golden set (JSONL), one query per line; relevant ids may be namespaced:
+    {"query": "rap concerts in manchester", "relevant": ["event:188", "event:201"]}
+
+Usage:
+    # record once against the real services
+    python -m app.tools.evaluation golden.jsonl --record cassette.json
+    # replay and compare variants offline
+    python -m app.tools.evaluation golden.jsonl --cassette cassette.json \\
+        --variant ef16:QDRANT_HNSW_EF=16 --variant ef128:QDRANT_HNSW_EF=128
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import math
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from qdrant_client import QdrantClient
+
+from app.config.settings import settings
+from app.services.qdrant_service import QdrantService, qdrant_service
+from app.services.llm_service import llm_service
+from app.services.openai_service import openai_embedding_service
+from app.services.search_service import SearchService, RERANK_WINDOW
+from app.tools.hnsw_tuning import percentile
+from app.tools.replay import (
+    Cassette, RecordingLLMService, RecordingEmbeddingService, ReplayLLMService, ReplayEmbeddingService
+)
+
+
+class StageTimer:
+    """Records the latency of selected coroutine methods under a stage name"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+
+    def wrap(self, target, stages: Dict[str, str]):
+        return _TimedProxy(target, stages, self.samples)
+
+
+class _TimedProxy:
+    def __init__(self, target, stages: Dict[str, str], samples: Dict[str, List[float]]):
+        self._target = target
+        self._stages = stages
+        self._samples = samples
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name not in self._stages or not inspect.iscoroutinefunction(attr):
+            return attr
+
+        async def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await attr(*args, **kwargs)
+            finally:
+                self._samples[self._stages[name]].append((time.perf_counter() - started) * 1000)
+        return timed
+
+
+def load_golden_set(path: str) -> List[Dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def is_relevant(result: Dict, relevant: List[str]) -> bool:
+    qualified = f"{result['name_space']}:{result['original_id']}"
+    return qualified in relevant or str(result["original_id"]) in relevant
+
+
+def recall_at_k(results: List[Dict], relevant: List[str], k: int) -> float:
+    if not relevant:
+        return 0.0
+    hits = sum(1 for result in results[:k] if is_relevant(result, relevant))
+    return hits / len(relevant)
+
+
+def ndcg_at_k(results: List[Dict], relevant: List[str], k: int) -> float:
+    dcg = sum(
+        1 / math.log2(rank + 2)
+        for rank, result in enumerate(results[:k])
+        if is_relevant(result, relevant)
+    )
+    ideal = sum(1 / math.log2(rank + 2) for rank in range(min(k, len(relevant))))
+    return dcg / ideal if ideal else 0.0
+
+
+def parse_variant(spec: str) -> Tuple[str, Dict]:
+    """``label:KEY=VALUE,KEY=VALUE`` -> (label, {KEY: VALUE})"""
+    label, _, assignments = spec.partition(":")
+    overrides = {}
+    for assignment in filter(None, assignments.split(",")):
+        key, _, raw = assignment.partition("=")
+        try:
+            overrides[key] = json.loads(raw)
+        except json.JSONDecodeError:
+            overrides[key] = raw
+    return label, overrides
+
+
+async def evaluate_variant(golden_set: List[Dict], k: int, llm, embedder, vector_store) -> Dict:
+    timer = StageTimer()
+    service = SearchService(
+        llm=timer.wrap(llm, {"enhance_query": "enhance", "rerank_results": "rerank"}),
+        embedder=timer.wrap(embedder, {"get_text_embedding": "embed"}),
+        vector_store=timer.wrap(vector_store, {"search": "search"})
+    )
+
+    metrics = defaultdict(list)
+    for item in golden_set:
+        query, relevant = item["query"], [str(r) for r in item["relevant"]]
+        enhancement = await service.llm.enhance_query(query)
+        limit = max(RERANK_WINDOW, settings.RERANK_MAX_CANDIDATES) if settings.ADAPTIVE_DEPTH else RERANK_WINDOW
+        search_results = await service.enhanced_semantic_search(
+            enhancement, limit=limit, search_params=vector_store.build_search_params()
+        )
+        metrics["retrieval_recall"].append(recall_at_k(search_results, relevant, k))
+        metrics["retrieval_ndcg"].append(ndcg_at_k(search_results, relevant, k))
+
+        if settings.ADAPTIVE_DEPTH:
+            window = service.adaptive_window(search_results, bool(enhancement.other_keyword_filters), k)
+        else:
+            window = service.first_window(search_results, RERANK_WINDOW)
+        metrics["rerank_candidates"].append(len(window))
+
+        final_results = []
+        if window:
+            reranked = await service.llm.rerank_results(query, window, top_k=k)
+            final_results = service.merge_reranked_results(reranked, window)
+        metrics["rerank_recall"].append(recall_at_k(final_results, relevant, k))
+        metrics["rerank_ndcg"].append(ndcg_at_k(final_results, relevant, k))
+
+    report = {name: sum(values) / len(values) for name, values in metrics.items() if values}
+    for stage in ("enhance", "embed", "search", "rerank"):
+        report[f"{stage}_p50_ms"] = percentile(timer.samples[stage], 50)
+        report[f"{stage}_p95_ms"] = percentile(timer.samples[stage], 95)
+    return report
+
+
+def print_report(reports: Dict[str, Dict], k: int):
+    print(f"\n{'variant':<16} {f'vec R@{k}':>9} {f'vec nDCG':>9} {f'rr R@{k}':>9} {'rr nDCG':>9} {'rr cands':>9}")
+    for label, report in reports.items():
+        print(f"{label:<16} {report.get('retrieval_recall', 0):>9.3f} {report.get('retrieval_ndcg', 0):>9.3f} "
+              f"{report.get('rerank_recall', 0):>9.3f} {report.get('rerank_ndcg', 0):>9.3f} "
+              f"{report.get('rerank_candidates', 0):>9.1f}")
+
+    stages = ("enhance", "embed", "search", "rerank")
+    print(f"\n{'variant':<16} " + " ".join(f"{stage + ' p50/p95':>20}" for stage in stages))
+    for label, report in reports.items():
+        cells = [f"{report[f'{stage}_p50_ms']:.1f}/{report[f'{stage}_p95_ms']:.1f} ms" for stage in stages]
+        print(f"{label:<16} " + " ".join(f"{cell:>20}" for cell in cells))
+
+
+async def main(args):
+    golden_set = load_golden_set(args.golden_set)
+    vector_store = QdrantService(QdrantClient(path=args.qdrant_path)) if args.qdrant_path else qdrant_service
+
+    if args.record:
+        cassette = Cassette(args.record)
+        llm = RecordingLLMService(llm_service, cassette)
+        embedder = RecordingEmbeddingService(openai_embedding_service, cassette)
+    else:
+        cassette = Cassette(args.cassette)
+        llm = ReplayLLMService(cassette)
+        embedder = ReplayEmbeddingService(cassette)
+
+    variants = [("baseline", {})] + [parse_variant(spec) for spec in args.variant or []]
+    reports = {}
+    for label, overrides in variants:
+        previous = {key: getattr(settings, key) for key in overrides}
+        for key, value in overrides.items():
+            setattr(settings, key, value)
+        try:
+            reports[label] = await evaluate_variant(golden_set, args.k, llm, embedder, vector_store)
+        finally:
+            for key, value in previous.items():
+                setattr(settings, key, value)
+
+    if args.record:
+        cassette.save()
+        print(f"Recorded responses to {args.record}")
+    elif llm.approximate_reranks:
+        print(f"Note: {llm.approximate_reranks} rerank(s) replayed against a different candidate set")
+
+    if args.qdrant_path:
+        vector_store.client.close()
+
+    print_report(reports, args.k)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate retrieval quality and per-stage latency")
+    parser.add_argument("golden_set", help="JSONL file of queries with relevant ids")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--cassette", help="Replay recorded LLM/embedding responses from this file")
+    source.add_argument("--record", help="Call the real services and record responses to this file")
+    parser.add_argument("--k", type=int, default=7, help="Cut-off for recall@k and nDCG@k")
+    parser.add_argument("--variant", action="append", help="label:SETTING=value,... evaluated next to the baseline")
+    parser.add_argument("--qdrant-path", help="Use a local on-disk Qdrant instead of QDRANT_URL")
+    parser.add_argument("--output", help="Write the report as JSON")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,209 @@
+"""HNSW tuning tool.
+
+Samples real queries, compares approximate search with exact search to measure
+recall@k and sweeps ``hnsw_ef`` (and optionally ``m``) to report the
+latency/recall frontier of the collection.
+
+Usage:
+    python -m app.tools.hnsw_tuning --queries queries.txt --ef 16 32 64 128 --m 16 32 --target-recall 0.95
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from typing import Dict, List, Optional
+
+from qdrant_client.http import models
+from qdrant_client.models import Filter, FieldCondition, MatchValue, VectorParams, Distance
+
+from app.config.settings import settings
+from app.services.qdrant_service import qdrant_service
+from app.services.openai_service import openai_embedding_service
+
+
+def load_queries(path: str, sample: int) -> List[str]:
+    with open(path, encoding="utf-8") as f:
+        queries = [line.strip() for line in f if line.strip()]
+    if sample and len(queries) > sample:
+        queries = random.sample(queries, sample)
+    return queries
+
+
+def sample_stored_vectors(collection_name: str, sample: int) -> List[List[float]]:
+    """Fallback when no query file is given: use stored vectors as queries"""
+    points, _ = qdrant_service.client.scroll(
+        collection_name=collection_name,
+        limit=max(sample * 4, sample),
+        with_vectors=True,
+        with_payload=False
+    )
+    vectors = [point.vector for point in points]
+    return random.sample(vectors, min(sample, len(vectors)))
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_queries(collection_name: str, vectors: List, k: int, query_filter: Optional[Filter],
+                search_params: models.SearchParams):
+    ids, latencies = [], []
+    for vector in vectors:
+        started = time.perf_counter()
+        response = qdrant_service.client.query_points(
+            collection_name=collection_name,
+            query=vector,
+            limit=k,
+            query_filter=query_filter,
+            search_params=search_params,
+            with_payload=False
+        )
+        latencies.append((time.perf_counter() - started) * 1000)
+        ids.append([point.id for point in response.points])
+    return ids, latencies
+
+
+def recall_at_k(approximate: List[List], exact: List[List], k: int) -> float:
+    recalls = []
+    for approx_ids, exact_ids in zip(approximate, exact):
+        if not exact_ids:
+            continue
+        recalls.append(len(set(approx_ids[:k]) & set(exact_ids[:k])) / min(k, len(exact_ids)))
+    return statistics.mean(recalls) if recalls else 0.0
+
+
+def copy_collection_with_m(m: int, ef_construct: Optional[int], batch_size: int = 256) -> str:
+    """Copy the collection into a scratch collection built with a different ``m``"""
+    scratch_name = f"{settings.COLLECTION_NAME}-tune-m{m}"
+    client = qdrant_service.client
+    if client.collection_exists(scratch_name):
+        client.delete_collection(scratch_name)
+    client.create_collection(
+        collection_name=scratch_name,
+        vectors_config=VectorParams(size=settings.EMBEDDING_DIMENSION, distance=Distance.COSINE),
+        hnsw_config=models.HnswConfigDiff(m=m, ef_construct=ef_construct)
+    )
+    client.create_payload_index(
+        collection_name=scratch_name,
+        field_name="name_space",
+        field_schema=models.PayloadSchemaType.KEYWORD
+    )
+
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=settings.COLLECTION_NAME,
+            limit=batch_size,
+            offset=offset,
+            with_vectors=True,
+            with_payload=True
+        )
+        if points:
+            client.upsert(
+                collection_name=scratch_name,
+                points=[models.PointStruct(id=p.id, vector=p.vector, payload=p.payload) for p in points],
+                wait=True
+            )
+        if offset is None:
+            break
+
+    while client.get_collection(scratch_name).status != models.CollectionStatus.GREEN:
+        time.sleep(1)
+    return scratch_name
+
+
+def pareto_frontier(rows: List[Dict]) -> List[Dict]:
+    frontier = []
+    best_recall = -1.0
+    for row in sorted(rows, key=lambda r: (r["p50_ms"], -r["recall"])):
+        if row["recall"] > best_recall:
+            frontier.append(row)
+            best_recall = row["recall"]
+    return frontier
+
+
+def sweep(collection_name: str, m_label, vectors: List, k: int, ef_values: List[int],
+          query_filter: Optional[Filter]) -> List[Dict]:
+    exact_ids, exact_latencies = run_queries(
+        collection_name, vectors, k, query_filter, models.SearchParams(exact=True)
+    )
+    info = qdrant_service.client.get_collection(collection_name)
+    print(f"[{collection_name}] points={info.points_count} indexed={info.indexed_vectors_count} "
+          f"exact p50={percentile(exact_latencies, 50):.2f}ms")
+
+    rows = []
+    for ef in ef_values:
+        approx_ids, latencies = run_queries(
+            collection_name, vectors, k, query_filter, models.SearchParams(hnsw_ef=ef, exact=False)
+        )
+        rows.append({
+            "m": m_label,
+            "hnsw_ef": ef,
+            "recall": recall_at_k(approx_ids, exact_ids, k),
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+        })
+    return rows
+
+
+def print_report(rows: List[Dict], k: int, target_recall: float):
+    print(f"\n{'m':>8} {'hnsw_ef':>8} {f'recall@{k}':>10} {'p50 ms':>8} {'p95 ms':>8}")
+    for row in rows:
+        print(f"{str(row['m']):>8} {row['hnsw_ef']:>8} {row['recall']:>10.4f} {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f}")
+
+    print("\nLatency/recall frontier:")
+    for row in pareto_frontier(rows):
+        print(f"  m={row['m']} hnsw_ef={row['hnsw_ef']} recall={row['recall']:.4f} p50={row['p50_ms']:.2f}ms")
+
+    candidates = [row for row in rows if row["recall"] >= target_recall]
+    if candidates:
+        best = min(candidates, key=lambda r: (r["p95_ms"], r["hnsw_ef"]))
+        print(f"\nCheapest settings with recall@{k} >= {target_recall}: "
+              f"m={best['m']} hnsw_ef={best['hnsw_ef']} (p95 {best['p95_ms']:.2f}ms)")
+        print(f"Set QDRANT_HNSW_EF={best['hnsw_ef']}" + (f" and QDRANT_HNSW_M={best['m']}" if best["m"] != "current" else ""))
+    else:
+        print(f"\nNo configuration reached recall@{k} >= {target_recall}; try larger --ef or --m values.")
+
+
+async def main(args):
+    if args.queries:
+        queries = load_queries(args.queries, args.sample)
+        vectors = await openai_embedding_service.get_batch_embeddings(queries)
+        print(f"Embedded {len(vectors)} sampled queries")
+    else:
+        vectors = sample_stored_vectors(settings.COLLECTION_NAME, args.sample)
+        print(f"Sampled {len(vectors)} stored vectors as queries")
+
+    query_filter = None
+    if args.name_space:
+        query_filter = Filter(must=[FieldCondition(key="name_space", match=MatchValue(value=args.name_space))])
+
+    rows = sweep(settings.COLLECTION_NAME, "current", vectors, args.k, args.ef, query_filter)
+    for m in args.m or []:
+        scratch_name = copy_collection_with_m(m, args.ef_construct)
+        try:
+            rows.extend(sweep(scratch_name, m, vectors, args.k, args.ef, query_filter))
+        finally:
+            if not args.keep:
+                qdrant_service.client.delete_collection(scratch_name)
+
+    print_report(rows, args.k, args.target_recall)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep HNSW parameters and report recall@k against exact search")
+    parser.add_argument("--queries", help="Text file with one real user query per line")
+    parser.add_argument("--sample", type=int, default=50, help="Number of queries to sample")
+    parser.add_argument("--k", type=int, default=15, help="Result depth used for recall@k")
+    parser.add_argument("--ef", type=int, nargs="+", default=[16, 32, 64, 128, 256], help="hnsw_ef values to sweep")
+    parser.add_argument("--m", type=int, nargs="*", help="m values to sweep on scratch copies of the collection")
+    parser.add_argument("--ef-construct", type=int, default=None, help="ef_construct for scratch collections")
+    parser.add_argument("--name-space", choices=["event", "product"], help="Restrict queries to one namespace")
+    parser.add_argument("--target-recall", type=float, default=0.95)
+    parser.add_argument("--keep", action="store_true", help="Keep scratch collections after the sweep")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,389 @@
+"""Concurrent load generator for /api/search and /api/upload.
+
+By default the app is driven in-process over ASGI. The OpenAI clients are
+replaced by stubs with log-normal latencies, and Qdrant runs in local mode.
+The stubs sit at the client level, so the real code paths still run:
+- embeddings go through asyncio.to_thread with a blocking stub call;
+- Qdrant calls go through asyncio.to_thread;
+- the LLM chains are awaited.
+As a result, default thread-pool saturation and event-loop blocking show up
+in the latency numbers, the loop-lag samples and the thread-pool queue depth.
+
+Two load shapes are supported:
+- closed loop (``--concurrency`` clients issuing requests back to back);
+- open loop (``--rate`` Poisson arrivals per second).
+In the open loop, latency is measured from each request's scheduled start,
+so queueing is not hidden.
+
+Usage:
+    python -m app.tools.load_test --concurrency 32 --duration 30
+    python -m app.tools.load_test --rate 40 --mix search=0.9,upload=0.1 --output load.json
+    # real server with stubbed upstreams, driven from another process
+    python -m app.tools.load_test --serve --port 8001
+    python -m app.tools.load_test --url http://localhost:8001 --rate 40
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import math
+import random
+import re
+import tempfile
+import time
+from collections import defaultdict
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+
+from app.config.settings import settings
+from app.schemas.query_enchancements_schemas import QueryEnhancement, RerankedResults, RankedResult, ShardScores, CandidateScore
+from app.tools.hnsw_tuning import percentile
+
+QUERIES = [
+    "rap concerts in manchester", "summer dress for women", "live music this weekend",
+    "comedy nights next month", "black cotton t shirt", "jazz events today", "running shoes for men",
+    "art exhibitions in london", "festival outfits", "family friendly events this week",
+]
+
+CITIES = ["Manchester", "London", "Leeds", "Liverpool", "Bristol"]
+GENRES = ["Concert", "Comedy", "Jazz", "Art", "Festival", "Theatre"]
+CATEGORIES = ["T shirt", "Dress", "Shoes", "Jacket", "Hoodie"]
+
+
+class LatencyModel:
+    """Log-normal latency given its median and 95th percentile, in seconds"""
+
+    def __init__(self, median: float, p95: float, scale: float = 1.0):
+        self.mu = math.log(median * scale) if median * scale > 0 else None
+        self.sigma = math.log(p95 / median) / 1.645 if median > 0 else 0.0
+
+    def sample(self) -> float:
+        return random.lognormvariate(self.mu, self.sigma) if self.mu is not None else 0.0
+
+
+def _fake_embedding(text: str) -> np.ndarray:
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    return np.random.default_rng(seed).standard_normal(settings.EMBEDDING_DIMENSION).astype(np.float32)
+
+
+class StubEmbeddingsAPI:
+    """Blocking stand-in for ``OpenAI().embeddings``; called from worker threads like the real client"""
+
+    def __init__(self, latency: LatencyModel):
+        self.latency = latency
+
+    def create(self, input, model, encoding_format="base64"):
+        time.sleep(self.latency.sample())
+        texts = input if isinstance(input, list) else [input]
+        return SimpleNamespace(
+            usage=SimpleNamespace(prompt_tokens=sum(len(text) // 4 + 1 for text in texts)),
+            data=[
+                SimpleNamespace(index=i, embedding=base64.b64encode(_fake_embedding(text).tobytes()).decode())
+                for i, text in enumerate(texts)
+            ]
+        )
+
+
+class StubChain:
+    """Async stand-in for a structured-output LangChain chain"""
+
+    def __init__(self, latency: LatencyModel, respond):
+        self.latency = latency
+        self.respond = respond
+
+    async def ainvoke(self, inputs: Dict):
+        await asyncio.sleep(self.latency.sample())
+        return self.respond(inputs)
+
+
+def _stub_enhancement(inputs: Dict) -> QueryEnhancement:
+    query = inputs["query"]
+    search_type = "product" if any(w in query for w in ("dress", "shirt", "shoes", "outfit")) else "event"
+    return QueryEnhancement(
+        event_enhanced_query=query,
+        product_enhanced_query=query,
+        search_type=search_type,
+        audience=None,
+        time_filter=None,
+        is_weekend="weekend" in query,
+        city=next((city for city in CITIES if city.lower() in query), None),
+        other_keyword_filters=[word for word in query.split() if len(word) > 4][:3]
+    )
+
+
+def _stub_rerank(inputs: Dict) -> RerankedResults:
+    found = re.findall(r"Result \d+ \(ID: (.+?), Type: (\w+)\)", inputs["results"])
+    return RerankedResults(results=[
+        RankedResult(name_space=name_space, original_id=original_id, relevance_score=9 - min(rank, 8),
+                     relevance_reason="Stubbed ranking")
+        for rank, (original_id, name_space) in enumerate(found[:int(inputs["top_k"])])
+    ])
+
+
+def _stub_shard_scores(inputs: Dict) -> ShardScores:
+    ids = [line.split("|", 1)[0] for line in inputs["candidates"].splitlines() if line]
+    return ShardScores(scores=[CandidateScore(id=i, score=random.randint(1, 10), reason="Stubbed") for i in ids])
+
+
+def make_item(data_type: str, item_id: int) -> Dict:
+    if data_type == "event":
+        return {
+            "id": item_id, "name": f"{random.choice(GENRES)} night {item_id}",
+            "description": "An evening of live entertainment", "city": random.choice(CITIES),
+            "start_date": f"{random.randint(1, 28):02d}/{random.randint(1, 12):02d}/2026",
+            "genre": random.choice(GENRES), "types_name": random.choice(GENRES), "tags": "music, live",
+        }
+    return {
+        "id": item_id, "product_name": f"{random.choice(CATEGORIES)} {item_id}",
+        "category_name": random.choice(CATEGORIES), "brand_name": "FLY",
+        "audience": random.choice(["Men", "Women", "Unisex"]), "tags": "summer, casual",
+    }
+
+
+def install_stubs(args) -> str:
+    """Point the service singletons at stubbed OpenAI clients and a local Qdrant; returns a scratch dir"""
+    from qdrant_client import QdrantClient
+    from app.services.cache_service import shared_cache
+    from app.services.llm_service import llm_service
+    from app.services.openai_service import openai_embedding_service
+    from app.services.qdrant_service import qdrant_service
+    from app.services.upload_job_service import upload_job_service, UploadJobStore
+
+    scratch = tempfile.mkdtemp(prefix="load-test-")
+    scale = args.latency_scale
+    openai_embedding_service.__dict__["client"] = SimpleNamespace(
+        embeddings=StubEmbeddingsAPI(LatencyModel(0.12, 0.35, scale)), close=lambda: None
+    )
+    llm_service.__dict__["enhancement_chain"] = StubChain(LatencyModel(1.1, 2.5, scale), _stub_enhancement)
+    llm_service.__dict__["reranking_chain"] = StubChain(LatencyModel(0.7, 1.6, scale), _stub_rerank)
+    llm_service.__dict__["shard_chain"] = StubChain(LatencyModel(0.35, 0.8, scale), _stub_shard_scores)
+    qdrant_service.__dict__["client"] = (
+        QdrantClient(path=args.qdrant_path) if args.qdrant_path else QdrantClient(location=":memory:")
+    )
+    upload_job_service.store = UploadJobStore(f"{scratch}/upload_jobs.db")
+    if not args.cache:
+        shared_cache.backend = None
+    settings.WARMUP_MODE = "off"
+    return scratch
+
+
+async def seed(count: int):
+    from app.services.qdrant_service import qdrant_service
+    from app.services.upload_service import upload_service
+    await qdrant_service.create_collection()
+    for data_type in ("event", "product"):
+        items = [make_item(data_type, i) for i in range(count)]
+        for start in range(0, len(items), upload_service.batch_size):
+            await upload_service.upload_batch(data_type, items[start:start + upload_service.batch_size])
+
+
+class Stats:
+    def __init__(self, record_after: float):
+        self.record_after = record_after
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.shed = 0
+
+    def record(self, endpoint: str, started: float, ok: bool):
+        if started < self.record_after:
+            return
+        self.latencies[endpoint].append((time.perf_counter() - started) * 1000)
+        if not ok:
+            self.errors[endpoint] += 1
+
+
+class RequestFactory:
+    def __init__(self, mix: Dict[str, float], top_k: int, upload_size: int):
+        self.endpoints = list(mix)
+        self.weights = [mix[endpoint] for endpoint in self.endpoints]
+        self.top_k = top_k
+        self.upload_size = upload_size
+        self.next_id = 1_000_000
+
+    def pick(self):
+        endpoint = random.choices(self.endpoints, self.weights)[0]
+        if endpoint == "search":
+            return endpoint, "/api/search", {"query": random.choice(QUERIES), "top_k": self.top_k}
+        data_type = random.choice(["event", "product"])
+        items = []
+        for _ in range(self.upload_size):
+            self.next_id += 1
+            items.append(make_item(data_type, self.next_id))
+        return endpoint, "/api/upload", {"data_type": data_type, "data": items}
+
+
+async def send(client: httpx.AsyncClient, request, stats: Stats, started: Optional[float] = None):
+    endpoint, path, body = request
+    started = started if started is not None else time.perf_counter()
+    try:
+        response = await client.post(path, json=body)
+        ok = response.status_code < 400
+    except Exception:
+        ok = False
+    stats.record(endpoint, started, ok)
+
+
+async def closed_loop(client, factory: RequestFactory, stats: Stats, concurrency: int, deadline: float):
+    async def worker():
+        while time.perf_counter() < deadline:
+            await send(client, factory.pick(), stats)
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def open_loop(client, factory: RequestFactory, stats: Stats, rate: float, deadline: float, max_in_flight: int):
+    in_flight = set()
+    scheduled = time.perf_counter()
+    while scheduled < deadline:
+        await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+        if len(in_flight) >= max_in_flight:
+            stats.shed += 1
+        else:
+            task = asyncio.create_task(send(client, factory.pick(), stats, started=scheduled))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        scheduled += random.expovariate(rate)
+    await asyncio.gather(*in_flight)
+
+
+async def monitor_loop(samples: Dict[str, List[float]], interval: float = 0.01):
+    """Samples event-loop lag and the default thread pool's queue depth"""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples["loop_lag_ms"].append((time.perf_counter() - started - interval) * 1000)
+        executor = getattr(loop, "_default_executor", None)
+        if executor is not None:
+            samples["threadpool_queue"].append(executor._work_queue.qsize())
+
+
+def summarize(stats: Stats, samples: Dict[str, List[float]], measured_seconds: float) -> Dict:
+    report = {"endpoints": {}, "shed": stats.shed}
+    for endpoint, latencies in sorted(stats.latencies.items()):
+        report["endpoints"][endpoint] = {
+            "requests": len(latencies),
+            "errors": stats.errors[endpoint],
+            "throughput_rps": len(latencies) / measured_seconds,
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "max_ms": max(latencies),
+        }
+    lag = samples.get("loop_lag_ms", [])
+    report["loop_lag_ms"] = {"p50": percentile(lag, 50), "p99": percentile(lag, 99), "max": max(lag, default=0.0)}
+    report["threadpool_queue_max"] = max(samples.get("threadpool_queue", []), default=0)
+    return report
+
+
+def print_report(report: Dict, shape: str):
+    print(f"\n{shape}")
+    print(f"{'endpoint':<10} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for endpoint, row in report["endpoints"].items():
+        print(f"{endpoint:<10} {row['requests']:>9} {row['errors']:>7} {row['throughput_rps']:>8.1f} "
+              f"{row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f} {row['max_ms']:>9.1f}")
+    lag = report["loop_lag_ms"]
+    print(f"\nevent-loop lag: p50 {lag['p50']:.1f} ms, p99 {lag['p99']:.1f} ms, max {lag['max']:.1f} ms; "
+          f"thread-pool queue max {report['threadpool_queue_max']}; shed {report['shed']}")
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        endpoint, _, weight = part.partition("=")
+        if endpoint not in ("search", "upload"):
+            raise SystemExit(f"Unknown endpoint in --mix: {endpoint}")
+        mix[endpoint] = float(weight or 1)
+    return mix
+
+
+async def run_load(args) -> Dict:
+    samples: Dict[str, List[float]] = defaultdict(list)
+    factory = RequestFactory(parse_mix(args.mix), args.top_k, args.upload_size)
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+        lifespan = None
+    else:
+        install_stubs(args)
+        from app.main import app
+        await seed(args.seed_items)
+        lifespan = app.router.lifespan_context(app)
+        await lifespan.__aenter__()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load-test",
+                                   timeout=args.timeout)
+
+    monitor = asyncio.create_task(monitor_loop(samples))
+    started = time.perf_counter()
+    stats = Stats(record_after=started + args.warmup)
+    deadline = started + args.warmup + args.duration
+    try:
+        if args.rate:
+            shape = f"open loop, {args.rate} req/s Poisson arrivals, max {args.max_in_flight} in flight"
+            await open_loop(client, factory, stats, args.rate, deadline, args.max_in_flight)
+        else:
+            shape = f"closed loop, {args.concurrency} concurrent clients"
+            await closed_loop(client, factory, stats, args.concurrency, deadline)
+        measured_seconds = time.perf_counter() - stats.record_after
+    finally:
+        monitor.cancel()
+        await client.aclose()
+        if lifespan is not None:
+            await lifespan.__aexit__(None, None, None)
+
+    report = summarize(stats, samples, measured_seconds)
+    print_report(report, shape + (" (loop lag is the load generator's)" if args.url else ""))
+    return report
+
+
+async def serve(args):
+    """Run the real app under uvicorn with stubbed upstreams, reporting its loop lag on exit"""
+    import uvicorn
+    install_stubs(args)
+    from app.main import app
+    await seed(args.seed_items)
+    samples: Dict[str, List[float]] = defaultdict(list)
+    monitor = asyncio.create_task(monitor_loop(samples))
+    try:
+        await uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning")).serve()
+    finally:
+        monitor.cancel()
+        lag = samples["loop_lag_ms"]
+        print(f"server event-loop lag: p50 {percentile(lag, 50):.1f} ms, p99 {percentile(lag, 99):.1f} ms, "
+              f"max {max(lag, default=0.0):.1f} ms; thread-pool queue max {max(samples['threadpool_queue'], default=0)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test /api/search and /api/upload")
+    parser.add_argument("--url", help="Drive a running server instead of the in-process app")
+    parser.add_argument("--serve", action="store_true", help="Serve the app with stubbed upstreams on --port")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--concurrency", type=int, default=16, help="Closed-loop clients (ignored with --rate)")
+    parser.add_argument("--rate", type=float, help="Open-loop Poisson arrival rate in requests per second")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="Open-loop requests beyond this are shed")
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="Seconds of load before measuring")
+    parser.add_argument("--mix", default="search=0.9,upload=0.1", help="Endpoint weights")
+    parser.add_argument("--top-k", type=int, default=7)
+    parser.add_argument("--upload-size", type=int, default=20, help="Items per upload request")
+    parser.add_argument("--seed-items", type=int, default=500, help="Items per type uploaded before the run")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Multiplier for stubbed upstream latency")
+    parser.add_argument("--cache", action="store_true", help="Keep the shared cache enabled")
+    parser.add_argument("--qdrant-path", help="On-disk local Qdrant instead of in-memory")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    if args.serve:
+        try:
+            asyncio.run(serve(args))
+        except KeyboardInterrupt:
+            pass
+    else:
+        result = asyncio.run(run_load(args))
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(result, f, indent=2)
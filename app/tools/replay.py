@@ -0,0 +1,132 @@
+"""Recording and replaying stand-ins for the LLM and embedding services.
+
+A cassette is a JSON file holding enhancements, rerankings and embeddings
+captured from the real services, so offline tools can run the search pipeline
+without network access.
+"""
+import json
+import os
+from typing import Dict, List
+
+import numpy as np
+
+from app.schemas.query_enchancements_schemas import QueryEnhancement, RerankedResults, RankedResult
+
+
+class Cassette:
+    def __init__(self, path: str):
+        self.path = path
+        self.enhancements: Dict[str, dict] = {}
+        self.reranks: Dict[str, dict] = {}
+        self.embeddings: Dict[str, List[float]] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.enhancements = data.get("enhancements", {})
+            self.reranks = data.get("reranks", {})
+            self.embeddings = data.get("embeddings", {})
+
+    def save(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({
+                "enhancements": self.enhancements,
+                "reranks": self.reranks,
+                "embeddings": self.embeddings
+            }, f)
+
+    @staticmethod
+    def rerank_key(user_query: str, top_k: int) -> str:
+        return f"{top_k}:{user_query}"
+
+
+class RecordingLLMService:
+    """Delegates to the real LLM service and records every response"""
+
+    def __init__(self, inner, cassette: Cassette):
+        self.inner = inner
+        self.cassette = cassette
+
+    async def enhance_query(self, user_query: str) -> QueryEnhancement:
+        result = await self.inner.enhance_query(user_query)
+        self.cassette.enhancements[user_query] = result.model_dump()
+        return result
+
+    async def rerank_results(self, user_query: str, search_results: list, top_k: int = 7) -> RerankedResults:
+        result = await self.inner.rerank_results(user_query, search_results, top_k=top_k)
+        self.cassette.reranks[Cassette.rerank_key(user_query, top_k)] = result.model_dump()
+        return result
+
+
+class RecordingEmbeddingService:
+    def __init__(self, inner, cassette: Cassette):
+        self.inner = inner
+        self.cassette = cassette
+
+    async def get_text_embedding(self, text: str) -> np.ndarray:
+        embedding = await self.inner.get_text_embedding(text)
+        self.cassette.embeddings[text] = [float(x) for x in embedding]
+        return embedding
+
+    async def get_batch_embeddings(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        embeddings = await self.inner.get_batch_embeddings(texts, batch_size)
+        for text, embedding in zip(texts, embeddings):
+            self.cassette.embeddings[text] = [float(x) for x in embedding]
+        return embeddings
+
+
+class ReplayLLMService:
+    """Replays recorded LLM responses.
+
+    When the candidate set differs from the recording (e.g. after a retrieval
+    change), the recorded ranking is restricted to the candidates that are
+    still present and padded in vector order, and ``approximate_reranks`` is
+    incremented.
+    """
+
+    def __init__(self, cassette: Cassette):
+        self.cassette = cassette
+        self.approximate_reranks = 0
+
+    async def enhance_query(self, user_query: str) -> QueryEnhancement:
+        if user_query not in self.cassette.enhancements:
+            raise KeyError(f"No recorded enhancement for query: {user_query!r}")
+        return QueryEnhancement(**self.cassette.enhancements[user_query])
+
+    async def rerank_results(self, user_query: str, search_results: list, top_k: int = 7) -> RerankedResults:
+        candidates = {(r["name_space"], r["original_id"]): r for r in search_results}
+        recorded = self.cassette.reranks.get(Cassette.rerank_key(user_query, top_k), {"results": []})
+        ranked = [
+            RankedResult(**item) for item in recorded["results"]
+            if (item["name_space"], item["original_id"]) in candidates
+        ]
+        if len(ranked) < min(top_k, len(recorded["results"])) or not recorded["results"]:
+            self.approximate_reranks += 1
+
+        seen = {(r.name_space, r.original_id) for r in ranked}
+        for result in search_results:
+            if len(ranked) >= top_k:
+                break
+            key = (result["name_space"], result["original_id"])
+            if key in seen:
+                continue
+            seen.add(key)
+            ranked.append(RankedResult(
+                name_space=result["name_space"],
+                original_id=result["original_id"],
+                relevance_score=1,
+                relevance_reason="Not in recorded ranking"
+            ))
+        return RerankedResults(results=ranked[:top_k])
+
+
+class ReplayEmbeddingService:
+    def __init__(self, cassette: Cassette):
+        self.cassette = cassette
+
+    async def get_text_embedding(self, text: str) -> np.ndarray:
+        if text not in self.cassette.embeddings:
+            raise KeyError(f"No recorded embedding for text: {text[:80]!r}")
+        return np.array(self.cassette.embeddings[text], dtype=np.float32)
+
+    async def get_batch_embeddings(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        return np.array([await self.get_text_embedding(text) for text in texts], dtype=np.float32)
@@ -0,0 +1,211 @@
+"""Collection snapshot export/import.
+
+Export streams every point (id, float32 vector, payload) from the collection
+into local shards: one ``vectors-NNNNN.npy`` matrix and one
+``points-NNNNN.jsonl`` file (id and payload per line, row-aligned) per
+shard, plus ``manifest.json``. Import recreates the collection and its
+payload indexes with ``create_collection`` and bulk-loads the shards with
+parallel batched upserts. No embeddings are requested, so a restore is
+bound by disk and Qdrant ingest speed rather than the OpenAI API.
+
+Usage:
+    python -m app.tools.snapshot export ./snapshot
+    python -m app.tools.snapshot import ./snapshot --recreate --parallel 4
+    python -m app.tools.snapshot import ./snapshot --qdrant-path ./qdrant-local
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+
+import numpy as np
+from qdrant_client import QdrantClient
+
+from app.config.settings import settings
+from app.services.qdrant_service import QdrantService, qdrant_service
+
+FORMAT_VERSION = 1
+# Qdrant's default; used when the collection does not report its own threshold
+DEFAULT_INDEXING_THRESHOLD = 20000
+
+
+def write_shard(directory: str, index: int, ids: List, vectors: np.ndarray, payloads: List[Dict]) -> Dict:
+    vectors_file = f"vectors-{index:05d}.npy"
+    points_file = f"points-{index:05d}.jsonl"
+    np.save(os.path.join(directory, vectors_file), vectors)
+    with open(os.path.join(directory, points_file), "w", encoding="utf-8") as f:
+        for point_id, payload in zip(ids, payloads):
+            f.write(json.dumps({"id": point_id, "payload": payload}, ensure_ascii=False) + "\n")
+    return {"vectors": vectors_file, "points": points_file, "count": len(ids)}
+
+
+def read_shard(directory: str, shard: Dict) -> Tuple[List, np.ndarray, List[Dict]]:
+    vectors = np.load(os.path.join(directory, shard["vectors"]))
+    ids, payloads = [], []
+    with open(os.path.join(directory, shard["points"]), encoding="utf-8") as f:
+        for line in f:
+            row = json.loads(line)
+            ids.append(row["id"])
+            payloads.append(row["payload"])
+    if vectors.shape[0] != len(ids) or len(ids) != shard["count"]:
+        raise ValueError(f"Shard {shard['points']} is inconsistent: {vectors.shape[0]} vectors, "
+                         f"{len(ids)} points, {shard['count']} expected")
+    return ids, vectors, payloads
+
+
+async def export_collection(store: QdrantService, directory: str, shard_size: int, page_size: int) -> Dict:
+    os.makedirs(directory, exist_ok=True)
+    info = await store.collection_info()
+    vector_size = info.config.params.vectors.size
+    started = time.perf_counter()
+
+    # Pages are copied into a preallocated float32 shard matrix as they arrive, so at most
+    # two shards (one filling, one being written) are held in memory
+    shards: List[Dict] = []
+    ids, payloads = [], []
+    vectors = np.empty((shard_size, vector_size), dtype=np.float32)
+    pending_write = None
+    offset = None
+
+    async def flush():
+        nonlocal ids, payloads, vectors, pending_write
+        if pending_write is not None:
+            shards.append(await pending_write)
+        # Write in a thread while the next pages are scrolled
+        pending_write = asyncio.ensure_future(
+            asyncio.to_thread(write_shard, directory, len(shards), ids, vectors[:len(ids)], payloads)
+        )
+        ids, payloads = [], []
+        vectors = np.empty((shard_size, vector_size), dtype=np.float32)
+
+    while True:
+        points, offset = await store.scroll_points(min(page_size, shard_size), offset)
+        position = 0
+        while position < len(points):
+            page = points[position:position + shard_size - len(ids)]
+            vectors[len(ids):len(ids) + len(page)] = np.asarray([point.vector for point in page], dtype=np.float32)
+            ids.extend(point.id for point in page)
+            payloads.extend(point.payload for point in page)
+            position += len(page)
+            if len(ids) == shard_size:
+                await flush()
+        if offset is None:
+            break
+    if ids:
+        await flush()
+    if pending_write is not None:
+        shards.append(await pending_write)
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "collection": store.collection_name,
+        "vector_size": info.config.params.vectors.size,
+        "distance": str(info.config.params.vectors.distance.value),
+        "embedding_model": settings.EMBEDDING_MODEL_NAME,
+        "points": sum(shard["count"] for shard in shards),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "shards": shards,
+    }
+    with open(os.path.join(directory, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    elapsed = time.perf_counter() - started
+    print(f"Exported {manifest['points']} points in {len(shards)} shards to {directory} in {elapsed:.1f}s")
+    return manifest
+
+
+async def import_collection(store: QdrantService, directory: str, batch_size: int, parallel: int,
+                            recreate: bool) -> int:
+    with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT_VERSION:
+        raise SystemExit(f"Unsupported snapshot format: {manifest.get('format')}")
+    if manifest["vector_size"] != settings.EMBEDDING_DIMENSION:
+        raise SystemExit(f"Snapshot vectors have {manifest['vector_size']} dimensions, "
+                         f"EMBEDDING_DIMENSION is {settings.EMBEDDING_DIMENSION}")
+    if manifest["embedding_model"] != settings.EMBEDDING_MODEL_NAME:
+        print(f"Warning: snapshot was embedded with {manifest['embedding_model']}, "
+              f"queries will use {settings.EMBEDDING_MODEL_NAME}")
+
+    if recreate:
+        try:
+            await store.delete_collection()
+        except Exception as e:
+            print(f"Could not delete collection '{store.collection_name}': {e}")
+    await store.create_collection()
+
+    info = await store.collection_info()
+    indexing_threshold = info.config.optimizer_config.indexing_threshold or DEFAULT_INDEXING_THRESHOLD
+    # Build the HNSW graph once after the load instead of incrementally during it
+    await store.set_indexing_threshold(0)
+
+    started = time.perf_counter()
+    in_flight = set()
+    loaded = 0
+    try:
+        for shard in manifest["shards"]:
+            ids, vectors, payloads = await asyncio.to_thread(read_shard, directory, shard)
+            for start in range(0, len(ids), batch_size):
+                if len(in_flight) >= parallel:
+                    done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        task.result()
+                in_flight.add(asyncio.ensure_future(store.upsert_vectors(
+                    ids[start:start + batch_size], vectors[start:start + batch_size],
+                    payloads[start:start + batch_size]
+                )))
+            loaded += len(ids)
+            print(f"Queued {loaded}/{manifest['points']} points")
+        if in_flight:
+            for task in (await asyncio.wait(in_flight))[0]:
+                task.result()
+    finally:
+        await store.set_indexing_threshold(indexing_threshold)
+
+    elapsed = time.perf_counter() - started
+    count = await store.count_points()
+    print(f"Imported {loaded} points into '{store.collection_name}' in {elapsed:.1f}s "
+          f"({loaded / elapsed if elapsed else 0:.0f} points/s); collection now has {count} points")
+    if count < manifest["points"]:
+        print(f"Warning: expected at least {manifest['points']} points")
+    return loaded
+
+
+async def main(args):
+    store = QdrantService(QdrantClient(path=args.qdrant_path)) if args.qdrant_path else qdrant_service
+    if args.qdrant_path and args.command == "import" and args.parallel > 1:
+        print("Local Qdrant is not safe for concurrent writes, importing with --parallel 1")
+        args.parallel = 1
+    if args.collection:
+        store.collection_name = args.collection
+    try:
+        if args.command == "export":
+            await export_collection(store, args.directory, args.shard_size, args.page_size)
+        else:
+            await import_collection(store, args.directory, args.batch_size, args.parallel, args.recreate)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export or import a collection snapshot")
+    parser.add_argument("--qdrant-path", help="Use an on-disk local Qdrant instead of QDRANT_URL")
+    parser.add_argument("--collection", help="Collection name (defaults to COLLECTION_NAME)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="Stream the collection to local shards")
+    export_parser.add_argument("directory")
+    export_parser.add_argument("--shard-size", type=int, default=10000,
+                               help="Points per shard; about 60 MB of vectors at 1536 dimensions")
+    export_parser.add_argument("--page-size", type=int, default=1000, help="Points per scroll request")
+
+    import_parser = commands.add_parser("import", help="Bulk-load shards into the collection")
+    import_parser.add_argument("directory")
+    import_parser.add_argument("--batch-size", type=int, default=500, help="Points per upsert")
+    import_parser.add_argument("--parallel", type=int, default=4, help="Concurrent upserts")
+    import_parser.add_argument("--recreate", action="store_true",
+                               help="Drop the collection first instead of upserting into it")
+
+    asyncio.run(main(parser.parse_args()))
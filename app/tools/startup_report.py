@@ -0,0 +1,106 @@
+"""Cold-start report: import cost per module, app import time and warm-up time.
+
+Every measurement runs in a fresh interpreter so module caches from this
+process do not hide the real cost. Pass ``--baseline`` with an earlier
+``--output`` file to fail when import time regresses.
+
+Usage:
+    python -m app.tools.startup_report --output startup.json
+    python -m app.tools.startup_report --baseline startup.json --threshold 0.2
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+WARMUP_SNIPPET = """
+import asyncio, json, time
+started = time.perf_counter()
+import app.main
+from app.services.startup_service import warm_up, startup_timings, close_clients
+imported = time.perf_counter()
+asyncio.run(warm_up())
+close_clients()
+print(json.dumps({"import_ms": (imported - started) * 1000, "warmup": startup_timings}))
+"""
+
+
+def _run(args: List[str]) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, "-W", "ignore"] + args, capture_output=True, text=True)
+
+
+def top_imports(limit: int) -> List[Dict]:
+    """Modules with the highest cumulative import time, from ``python -X importtime``"""
+    result = _run(["-X", "importtime", "-c", "import app.main"])
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, self_us, cumulative_us, name = [part.strip() for part in line.replace("import time:", "|").split("|")]
+        modules.append({"module": name, "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000})
+    modules.sort(key=lambda module: module["cumulative_ms"], reverse=True)
+    return modules[:limit]
+
+
+def import_time_ms(runs: int) -> float:
+    """Median wall time of ``import app.main`` in a fresh interpreter"""
+    snippet = "import time; s = time.perf_counter(); import app.main; print((time.perf_counter() - s) * 1000)"
+    samples = []
+    for _ in range(runs):
+        result = _run(["-c", snippet])
+        if result.returncode != 0:
+            raise RuntimeError(f"Importing app.main failed:\n{result.stderr}")
+        samples.append(float(result.stdout.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+
+def warmup_timings() -> Dict:
+    result = _run(["-c", WARMUP_SNIPPET])
+    if result.returncode != 0:
+        raise RuntimeError(f"Warm-up failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(args) -> int:
+    report = {
+        "import_ms": import_time_ms(args.runs),
+        "top_imports": top_imports(args.top),
+        "warmup": warmup_timings()["warmup"] if args.warmup else {},
+    }
+
+    print(f"import app.main: {report['import_ms']:.0f} ms (median of {args.runs})")
+    print(f"\n{'module':<50} {'cumulative':>12} {'self':>10}")
+    for module in report["top_imports"]:
+        print(f"{module['module'][:50]:<50} {module['cumulative_ms']:>9.1f} ms {module['self_ms']:>7.1f} ms")
+    if report["warmup"]:
+        print("\nwarm-up steps:")
+        for step, ms in report["warmup"].items():
+            print(f"  {step:<20} {ms:>9.1f} ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        limit = baseline["import_ms"] * (1 + args.threshold)
+        if report["import_ms"] > limit:
+            print(f"\nREGRESSION: import took {report['import_ms']:.0f} ms, "
+                  f"baseline {baseline['import_ms']:.0f} ms (limit {limit:.0f} ms)")
+            return 1
+        print(f"\nOK: within {args.threshold:.0%} of baseline ({baseline['import_ms']:.0f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure cold-start import and warm-up cost")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh-interpreter imports to take the median of")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest modules to list")
+    parser.add_argument("--warmup", action="store_true", help="Also time warm-up (contacts Qdrant and OpenAI)")
+    parser.add_argument("--output", help="Write the report as JSON")
+    parser.add_argument("--baseline", help="Earlier JSON report to compare import time against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative import-time regression")
+    sys.exit(main(parser.parse_args()))
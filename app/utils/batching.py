@@ -0,0 +1,68 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, List, Optional, Sequence, Set, TypeVar
+
+K = TypeVar("K")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[K, R]):
+    """Coalesces concurrent single-item calls into batched calls.
+
+    Items submitted within ``max_wait`` seconds of the first pending item, or
+    until ``max_items`` distinct items are pending, are processed with one
+    ``process_batch`` call. Identical items in a batch are processed once.
+    ``process_batch`` must return one result per item, in order.
+    """
+
+    def __init__(self, process_batch: Callable[[List[K]], Awaitable[Sequence[R]]],
+                 max_items: int, max_wait: float):
+        self.process_batch = process_batch
+        self.max_items = max_items
+        self.max_wait = max_wait
+        self._pending: Dict[K, List[asyncio.Future]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Strong references to running batches; the event loop only keeps weak ones
+        self._tasks: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, item: K) -> R:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(item, []).append(future)
+        if len(self._pending) >= self.max_items:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        # Drop items whose every caller has gone away (cancelled or timed out)
+        pending = {
+            item: futures for item, futures in self._pending.items()
+            if any(not future.done() for future in futures)
+        }
+        self._pending = {}
+        if pending:
+            task = asyncio.ensure_future(self._run(pending))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, pending: Dict[K, List[asyncio.Future]]):
+        items = list(pending)
+        self.batches += 1
+        self.items += len(items)
+        try:
+            results = await self.process_batch(items)
+        except Exception as e:
+            for futures in pending.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+        for item, result in zip(items, results):
+            for future in pending[item]:
+                if not future.done():
+                    future.set_result(result)
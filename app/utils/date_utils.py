@@ -48,4 +48,24 @@ def is_weekend(date_str: str) -> str:
     if weekend_or_not:
         return "weekend"
     else:
-        return "workday"
\ No newline at end of file
+        return "workday"
+
+def to_iso_datetime(value) -> str:
+    """Normalise dd/mm/YYYY, YYYY-mm-dd or ISO dates to the format stored in the start_date payload"""
+    if not value:
+        return ""
+    try:
+        if isinstance(value, str):
+            if "/" in value:
+                parsed_date = datetime.strptime(value, "%d/%m/%Y")
+            elif "-" in value and "T" in value:
+                parsed_date = datetime.fromisoformat(value.replace("Z", ""))
+            else:
+                parsed_date = datetime.strptime(value, "%Y-%m-%d")
+            return parsed_date.strftime("%Y-%m-%dT%H:%M:%SZ")
+        elif hasattr(value, 'strftime'):
+            return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+        else:
+            return str(value)
+    except (ValueError, TypeError) as e:
+        return str(value)
\ No newline at end of file
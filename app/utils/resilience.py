@@ -0,0 +1,181 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is short-circuited because the upstream is failing"""
+
+
+class RequestBudget:
+    """Per-request deadline split across stages, plus the stages that had to degrade"""
+
+    def __init__(self, total_seconds: float):
+        self.total_seconds = total_seconds
+        self.started = time.monotonic()
+        self.degraded: List[str] = []
+
+    def remaining(self) -> float:
+        return max(0.0, self.total_seconds - (time.monotonic() - self.started))
+
+    def stage_timeout(self, fraction: Optional[float] = None) -> float:
+        """Timeout for the next stage: its share of the total, capped by what is left"""
+        if fraction is None:
+            return self.remaining()
+        return min(self.total_seconds * fraction, self.remaining())
+
+    def mark_degraded(self, stage: str):
+        if stage not in self.degraded:
+            self.degraded.append(stage)
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one upstream.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls fail fast for ``reset_seconds``; then a single trial call is let
+    through and closes the circuit again if it succeeds.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def _allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+    async def call(self, factory: Callable[[], Awaitable[T]], timeout: float) -> T:
+        if timeout <= 0:
+            # Out of budget before the call started; not the upstream's fault
+            raise asyncio.TimeoutError(f"No time budget left for {self.name}")
+        if not self._allow():
+            raise CircuitOpenError(f"Circuit for {self.name} is open")
+        try:
+            result = await asyncio.wait_for(factory(), timeout)
+        except asyncio.CancelledError:
+            self.trial_in_flight = False
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+
+async def hedged(factory: Callable[[], Awaitable[T]], delay: float) -> T:
+    """Start a second identical call if the first has not answered after ``delay`` seconds.
+
+    The first successful result wins and the other call is cancelled. A first
+    call that fails early triggers the hedge immediately.
+    """
+    tasks = {asyncio.ensure_future(factory())}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        for task in done:
+            if task.exception() is None:
+                return task.result()
+            tasks.discard(task)
+
+        tasks.add(asyncio.ensure_future(factory()))
+        error: Optional[BaseException] = None
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+class TokenBucket:
+    """Refills ``rate`` units per second up to ``capacity``; waiters are served in arrival order"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.level = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1):
+        # Anything larger than the bucket could never fit, it waits for a full bucket instead
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            self._refill()
+            while self.level < amount:
+                await asyncio.sleep((amount - self.level) / self.rate)
+                self._refill()
+            self.level -= amount
+
+    def debit(self, amount: float):
+        """Correct an estimate after the fact; the level may go negative and is repaid by waiting"""
+        self._refill()
+        self.level -= amount
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute quota; a limit of 0 disables that bucket.
+
+    Bucket capacity is ``burst_seconds`` worth of quota, so a burst cannot
+    spend the whole minute at once.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, burst_seconds: float = 1.0):
+        self.requests = self._bucket(requests_per_minute, burst_seconds)
+        self.tokens = self._bucket(tokens_per_minute, burst_seconds)
+
+    @staticmethod
+    def _bucket(per_minute: float, burst_seconds: float) -> Optional[TokenBucket]:
+        if not per_minute:
+            return None
+        rate = per_minute / 60
+        return TokenBucket(rate, max(1.0, rate * burst_seconds))
+
+    async def acquire(self, tokens: int):
+        if self.requests:
+            await self.requests.acquire(1)
+        if self.tokens:
+            await self.tokens.acquire(tokens)
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int):
+        if self.tokens:
+            self.tokens.debit(actual_tokens - estimated_tokens)
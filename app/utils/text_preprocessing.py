@@ -1,4 +1,6 @@
+import re
 from datetime import datetime
+from typing import List
 
 def prepare_event_text(row_dict: dict) -> str:
     def safe_str(value):
@@ -146,4 +148,103 @@ def prepare_product_text(row_dict: dict) -> str:
     if safe_str(row_dict.get('tags')):
         text_parts.append(f"The product is tagged with {safe_str(row_dict.get('tags'))}.")
     
-    return " ".join(text_parts)
\ No newline at end of file
+    return " ".join(text_parts)
+
+SUGGEST_FIELDS = {
+    "event": ["name", "types_name", "genre", "tags"],
+    "product": ["product_name", "category_name", "brand_name", "tags"],
+}
+
+SUGGEST_CONTENT_PATTERNS = [
+    r"^This is an event called (.+?)(?: which is described as |\.(?:\s|$))",
+    r"^This is a product named (.+?)(?: which is |\.(?:\s|$))",
+    r"falls under the (.+?) category",
+    r"belongs to the (.+?) category",
+    r"manufactured by the brand (.+?)\.(?:\s|$)",
+    r"The genre is (.+?)(?: and is designed|\.(?:\s|$))",
+    r"tagged with (.+?)\.(?:\s|$)",
+]
+
+def _split_terms(value) -> List[str]:
+    values = value if isinstance(value, list) else str(value).split(",")
+    return [str(v).strip() for v in values if v is not None and str(v).strip()]
+
+def prepare_suggest_terms(row_dict: dict, data_type: str) -> List[str]:
+    """Names, categories, brands, genres and tags offered as typeahead suggestions"""
+    terms = []
+    for field in SUGGEST_FIELDS.get(data_type, []):
+        value = row_dict.get(field)
+        if value is None or str(value).strip() == "":
+            continue
+        terms.extend(_split_terms(value) if field == "tags" else [str(value).strip()])
+    return list(dict.fromkeys(terms))
+
+def suggest_terms_from_content(content: str) -> List[str]:
+    """Recover suggestion terms from embedded text, for points uploaded without suggest_terms"""
+    terms = []
+    for pattern in SUGGEST_CONTENT_PATTERNS:
+        match = re.search(pattern, content or "")
+        if match:
+            terms.extend(_split_terms(match.group(1)) if "tagged" in pattern else [match.group(1).strip()])
+    return list(dict.fromkeys(terms))
+
+FACET_FIELDS = {
+    "event": {"city": "city", "genre": "genre", "category": "types_name"},
+    "product": {"category": "category_name", "brand": "brand_name"},
+}
+
+FACET_CONTENT_PATTERNS = {
+    "event": {
+        "genre": r"The genre is (.+?)(?: and is designed|\.(?:\s|$))",
+        "category": r"falls under the (.+?) category",
+    },
+    "product": {
+        "category": r"belongs to the (.+?) category",
+        "brand": r"manufactured by the brand (.+?)\.(?:\s|$)",
+    },
+}
+
+def normalize_facet(value) -> str:
+    """Keyword facets are stored and matched lowercased with collapsed whitespace"""
+    return " ".join(str(value).lower().split())
+
+def parse_price(value):
+    text = str(value).strip().lower().replace("£", "").replace(",", "")
+    if text == "free":
+        return 0.0
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+def prepare_facets(row_dict: dict, data_type: str) -> dict:
+    """Typed payload fields for indexed filtering: keyword facets and, for events, ticket_price"""
+    facets = {}
+    for facet, field in FACET_FIELDS.get(data_type, {}).items():
+        value = row_dict.get(field)
+        if value is not None and str(value).strip() != "":
+            facets[facet] = normalize_facet(value)
+    if data_type == "event" and row_dict.get("ticket_price") is not None:
+        price = parse_price(row_dict.get("ticket_price"))
+        if price is not None:
+            facets["ticket_price"] = price
+    return facets
+
+def facets_from_content(content: str, data_type: str) -> dict:
+    """Recover facets from embedded text, for points uploaded before facets were stored"""
+    content = content or ""
+    facets = {}
+    for facet, pattern in FACET_CONTENT_PATTERNS.get(data_type, {}).items():
+        match = re.search(pattern, content)
+        if match and match.group(1).strip():
+            facets[facet] = normalize_facet(match.group(1))
+    if data_type == "event":
+        # "located at address, city, state, country"; the city is only certain when all four are present
+        location = re.search(r"The venue is located at (.+?)(?: with zip code |\.(?:\s|$))", content)
+        parts = [part.strip() for part in location.group(1).split(",")] if location else []
+        if len(parts) >= 4 and parts[-3]:
+            facets["city"] = normalize_facet(parts[-3])
+        price = re.search(r"Tickets are priced at £([0-9][0-9,]*(?:\.[0-9]+)?)", content)
+        if price:
+            facets["ticket_price"] = parse_price(price.group(1))
+    return facets
\ No newline at end of file